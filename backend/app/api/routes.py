@@ -1,9 +1,16 @@
 """API route definitions"""
 
+import asyncio
 import logging
+import re
+import threading
+from dataclasses import asdict
+from functools import partial
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, FastAPI, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import State
 
 from app.api.schemas import (
     AnalyzeModelRequest,
@@ -16,6 +23,7 @@ from app.api.schemas import (
     ListModelsResponse,
 )
 from app.config import get_settings
+from app.core.batcher import DynamicBatcher
 from app.core.feature_detector import FeatureDetector
 from app.core.inference import InferencePipeline
 from app.core.model_loader import ModelLoader
@@ -25,129 +33,257 @@ from app.core.sae_manager import SAEManager
 
 logger = logging.getLogger(__name__)
 
-# Global instances (initialized in main.py)
-model_manager: Optional[ModelManager] = None
-sae_manager: Optional[SAEManager] = None
-feature_detector: Optional[FeatureDetector] = None
-inference_pipeline: Optional[InferencePipeline] = None
-model_store: Optional[ModelStore] = None
-model_loader: Optional[ModelLoader] = None
+# Matches Hugging Face model URLs like https://huggingface.co/organization/model-name
+_HF_URL_RE = re.compile(r"^(?:https?://)?(?:www\.)?huggingface\.co/([^/]+/[^/?#]+)")
 
 
 def set_instances(
+    app: FastAPI,
     model_mgr: Optional[ModelManager],
     sae_mgr: Optional[SAEManager],
     feat_det: FeatureDetector,
     inf_pipe: Optional[InferencePipeline],
     store: ModelStore,
 ):
-    """Set global instances (called from main.py)"""
-    global model_manager, sae_manager, feature_detector, inference_pipeline, model_store, model_loader
-    model_manager = model_mgr
-    sae_manager = sae_mgr
-    feature_detector = feat_det
-    inference_pipeline = inf_pipe
-    model_store = store
+    """Attach service instances to app.state (called from main.py)"""
+    state = app.state
+    state.model_manager = model_mgr
+    state.sae_manager = sae_mgr
+    state.feature_detector = feat_det
+    state.inference_pipeline = inf_pipe
+    state.model_store = store
+    state.model_loader = None
+    # Held while a batch generates and while a model is loaded or swapped, so
+    # a load from another endpoint can't change the model under a batch
+    state.model_lock = threading.Lock()
+    settings = get_settings()
     
-    # Initialize model loader for on-demand loading
-    if feature_detector is not None:
-        settings = get_settings()
-        model_loader = ModelLoader(settings, feature_detector)
+    if settings.enable_on_demand_loading:
+        # Initialize model loader for on-demand loading
+        if feat_det is not None:
+            state.model_loader = ModelLoader(settings, feat_det)
+    else:
+        # Everything must be loaded up front
+        if model_mgr is None or sae_mgr is None or inf_pipe is None:
+            raise ValueError(
+                "Model manager, SAE manager and inference pipeline are required "
+                "when on-demand loading is disabled"
+            )
+
+    # Snapshot static response data once instead of per request
+    state.config_response = ORJSONResponse(
+        content=ConfigResponse(
+            model_id=settings.model_id,
+            layer=settings.layer,
+            device=settings.device,
+            sae_base_path=settings.sae_base_path,
+            quarantined_features_count=(
+                len(feat_det.quarantined_features) if feat_det is not None else 0
+            ),
+        ).model_dump()
+    )
+    feature_detector_ready = feat_det is not None
+    state.health_template = HealthResponse(
+        status="healthy" if feature_detector_ready else "degraded",
+        model_loaded=False,
+        sae_loaded=False,
+        feature_detector_ready=feature_detector_ready,
+        model_id=settings.model_id,
+        layer=settings.layer,
+    )
+    state.health_responses = {}
+
+    # Concurrent /generate calls are micro-batched through the pipeline
+    state.generate_batcher = DynamicBatcher(
+        partial(_generate_batch, state),
+        max_batch_size=settings.max_batch_size,
+        max_latency_ms=settings.batch_max_latency_ms,
+        after_batch=partial(_clear_model_state, state),
+    )
+
+
+async def shutdown_instances(app: FastAPI):
+    """Stop background work attached to app.state (called from main.py)"""
+    batcher = getattr(app.state, "generate_batcher", None)
+    if batcher is not None:
+        await batcher.stop()
+
+
+def _sync_from_loader(state: State):
+    """Publish instances created by the on-demand loader to app.state"""
+    state.model_manager = state.model_loader.get_model_manager()
+    state.sae_manager = state.model_loader.get_sae_manager()
+    state.inference_pipeline = state.model_loader.get_inference_pipeline()
+
+
+def _load_with_model_lock(state: State, load, *args):
+    """
+    Run a blocking model load once no batch is generating.
+
+    Called through asyncio.to_thread so waiting for the lock doesn't block
+    the event loop. After a successful load the loader's instances are
+    published before the lock is released.
+    """
+    with state.model_lock:
+        result = load(*args)
+        if result:
+            _sync_from_loader(state)
+        return result
+
+
+class _ModelLoadError(RuntimeError):
+    """A request's model_id override could not be loaded"""
+
+
+def _generate_batch(state: State, items):
+    """
+    Run a micro-batch of generation requests through the inference pipeline.
+
+    Each item is a (prompt, layer, generation_config, model_id) tuple. Items
+    are grouped by model_id and each group runs after its model is loaded,
+    so a batch never mixes models. Requests without an override run first,
+    on whichever model is currently loaded. Loading happens here, in the
+    batcher's worker thread, so it does not block the event loop. The whole
+    batch runs under state.model_lock, which the /generate and
+    /models/analyze loader paths also take, so no other load can swap the
+    model under it.
+
+    Returns:
+        A result or Exception per item, in input order
+    """
+    groups = {}
+    for i, (_, _, _, model_id) in enumerate(items):
+        groups.setdefault(model_id, []).append(i)
+
+    results = [None] * len(items)
+    with state.model_lock:
+        for model_id in sorted(groups, key=lambda m: m is not None):
+            indices = groups[model_id]
+            if model_id is not None:
+                # reload_model will check if model is already loaded and skip if same
+                try:
+                    state.model_manager.reload_model(model_id)
+                except Exception as e:
+                    logger.error(f"Failed to load model {model_id}: {e}")
+                    error = _ModelLoadError(f"Failed to load model {model_id}: {str(e)}")
+                    for i in indices:
+                        results[i] = error
+                    continue
+
+            prompts, layers, gen_configs, _ = (
+                list(column) for column in zip(*(items[i] for i in indices))
+            )
+            outputs = state.inference_pipeline.generate_with_probing_batch(
+                prompts, layers=layers, generation_configs=gen_configs
+            )
+            for i, output in zip(indices, outputs):
+                results[i] = output
+
+    return results
+
+
+def _clear_model_state(state: State):
+    """
+    Clear model state after a batch to prevent context leakage.
+
+    Runs in the batcher after results are handed back, so it overlaps with
+    response serialization instead of delaying it.
+    """
+    try:
+        with state.model_lock:
+            if state.model_manager is not None:
+                state.model_manager.clear_model_state(release=False)
+    except Exception as e:
+        logger.warning(f"Failed to clear model state: {e}")
+
+
+# Responses with more activated features than this are serialized off the event loop
+_OFFLOAD_SERIALIZATION_THRESHOLD = 100
+
+
+def _build_generate_response(result) -> ORJSONResponse:
+    """
+    Serialize an InferenceResult directly: fields come from internal, already
+    typed dataclasses, so Pydantic validation is skipped.
+    """
+    return ORJSONResponse(
+        {
+            "generated_text": result.generated_text,
+            "prompt": result.prompt,
+            "has_quarantined_features": result.has_quarantined_features,
+            "activated_features": [asdict(feat) for feat in result.activated_features],
+            "generation_metadata": result.generation_metadata,
+            "warnings": result.warnings,
+        }
+    )
 
 
 router = APIRouter()
 
 
-@router.post("/generate", response_model=GenerateResponse)
-async def generate(request: GenerateRequest):
+@router.post(
+    "/generate",
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": GenerateResponse}},
+)
+async def generate(request: Request, body: GenerateRequest):
     """
     Generate text and detect quarantined feature activations.
     """
-    global model_manager, sae_manager, inference_pipeline
+    state = request.app.state
     
     # Ensure inference pipeline is available (load on-demand if needed)
-    if inference_pipeline is None:
-        if model_loader is None:
+    if state.inference_pipeline is None:
+        if state.model_loader is None:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Model loader not initialized",
             )
         try:
-            model_loader.ensure_inference_pipeline()
-            model_manager = model_loader.get_model_manager()
-            sae_manager = model_loader.get_sae_manager()
-            inference_pipeline = model_loader.get_inference_pipeline()
+            await asyncio.to_thread(
+                _load_with_model_lock, state, state.model_loader.ensure_inference_pipeline
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Inference pipeline not available: {str(e)}",
             )
 
-    try:
-        # Handle model_id override from request
-        if request.model_id is not None:
-            if model_manager is None:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="Model manager not initialized",
-                )
-            
-            # reload_model will check if model is already loaded and skip if same
-            try:
-                model_manager.reload_model(request.model_id)
-            except Exception as e:
-                logger.error(f"Failed to load model {request.model_id}: {e}")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to load model {request.model_id}: {str(e)}",
-                )
-        
-        # Prepare generation config
-        gen_config = {}
-        if request.max_new_tokens is not None:
-            gen_config["max_new_tokens"] = request.max_new_tokens
-        if request.temperature is not None:
-            gen_config["temperature"] = request.temperature
-        if request.top_p is not None:
-            gen_config["top_p"] = request.top_p
-        if request.top_k is not None:
-            gen_config["top_k"] = request.top_k
-        if request.do_sample is not None:
-            gen_config["do_sample"] = request.do_sample
-
-        # Generate with probing
-        result = inference_pipeline.generate_with_probing(
-            prompt=request.prompt,
-            layer=request.layer,
-            generation_config=gen_config if gen_config else None,
+    if body.model_id is not None and state.model_manager is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model manager not initialized",
         )
 
-        # Clear model state after serving request to prevent context leakage
-        try:
-            if model_manager is not None:
-                model_manager.clear_model_state()
-        except Exception as e:
-            logger.warning(f"Failed to clear model state: {e}")
-
-        # Convert to response schema
-        return GenerateResponse(
-            generated_text=result.generated_text,
-            prompt=result.prompt,
-            has_quarantined_features=result.has_quarantined_features,
-            activated_features=[
-                {
-                    "feature_index": feat.feature_index,
-                    "activation_value": feat.activation_value,
-                    "description": feat.description,
-                    "layer": feat.layer,
-                    "token_position": feat.token_position,
-                }
-                for feat in result.activated_features
-            ],
-            generation_metadata=result.generation_metadata,
-            warnings=result.warnings,
+    try:
+        # Prepare generation config (None when the request has no overrides)
+        gen_config = {
+            key: value
+            for key, value in (
+                ("max_new_tokens", body.max_new_tokens),
+                ("temperature", body.temperature),
+                ("top_p", body.top_p),
+                ("top_k", body.top_k),
+                ("do_sample", body.do_sample),
+            )
+            if value is not None
+        } or None
+
+        # Generate with probing (batched with concurrent requests). A model_id
+        # override is loaded by the batch handler, not here.
+        result = await state.generate_batcher.submit(
+            (body.prompt, body.layer, gen_config, body.model_id)
         )
 
+        if len(result.activated_features) > _OFFLOAD_SERIALIZATION_THRESHOLD:
+            return await asyncio.to_thread(_build_generate_response, result)
+        return _build_generate_response(result)
+
+    except _ModelLoadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     except Exception as e:
         logger.error(f"Error during generation: {e}", exc_info=True)
         raise HTTPException(
@@ -156,77 +292,86 @@ async def generate(request: GenerateRequest):
         )
 
 
+def _health_response(state: State, model_loaded: bool, sae_loaded: bool) -> ORJSONResponse:
+    """Get the serialized health response for this state, building it once"""
+    key = (model_loaded, sae_loaded)
+    response = state.health_responses.get(key)
+    if response is None:
+        template = state.health_template
+        response = ORJSONResponse(
+            content=template.model_copy(
+                update={
+                    "model_loaded": model_loaded,
+                    "sae_loaded": sae_loaded,
+                    "model_id": template.model_id if model_loaded else None,
+                    "layer": template.layer if sae_loaded else None,
+                }
+            ).model_dump()
+        )
+        state.health_responses[key] = response
+    return response
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health():
+def health(request: Request):
     """
     Health check endpoint.
     """
-    settings = get_settings()
+    state = request.app.state
+    if getattr(state, "health_template", None) is None:
+        return HealthResponse(
+            status="degraded",
+            model_loaded=False,
+            sae_loaded=False,
+            feature_detector_ready=False,
+        )
 
     # Service is healthy if feature detector is ready (core service)
-    # Models/SAEs are optional and loaded on-demand
+    # Models/SAEs are optional and loaded on-demand, so only these two
+    # flags are evaluated per request
+    model_manager = state.model_manager
+    sae_manager = state.sae_manager
     model_loaded = model_manager is not None and model_manager.is_loaded()
     sae_loaded = (
-        sae_manager is not None and sae_manager.has_sae(settings.layer)
+        sae_manager is not None and sae_manager.has_sae(state.health_template.layer)
     )
-    feature_detector_ready = feature_detector is not None
 
-    # Service is healthy if core components are ready
-    # Models/SAEs being loaded is a bonus but not required for health
-    status_str = "healthy" if feature_detector_ready else "degraded"
-
-    return HealthResponse(
-        status=status_str,
-        model_loaded=model_loaded,
-        sae_loaded=sae_loaded,
-        feature_detector_ready=feature_detector_ready,
-        model_id=settings.model_id if model_loaded else None,
-        layer=settings.layer if sae_loaded else None,
-    )
+    return _health_response(state, model_loaded, sae_loaded)
 
 
 @router.get("/config", response_model=ConfigResponse)
-async def get_config():
+def get_config(request: Request):
     """
     Get current configuration (non-sensitive).
     """
-    settings = get_settings()
-
-    quarantined_count = (
-        len(feature_detector.quarantined_features)
-        if feature_detector is not None
-        else 0
-    )
+    config_response = getattr(request.app.state, "config_response", None)
+    if config_response is None:
+        settings = get_settings()
+        return ConfigResponse(
+            model_id=settings.model_id,
+            layer=settings.layer,
+            device=settings.device,
+            sae_base_path=settings.sae_base_path,
+            quarantined_features_count=0,
+        )
 
-    return ConfigResponse(
-        model_id=settings.model_id,
-        layer=settings.layer,
-        device=settings.device,
-        sae_base_path=settings.sae_base_path,
-        quarantined_features_count=quarantined_count,
-    )
+    return config_response
 
 
 def extract_model_id_from_url(url: str) -> Optional[str]:
     """Extract model ID from Hugging Face URL"""
-    try:
-        # Handle URLs like: https://huggingface.co/organization/model-name
-        if "huggingface.co" in url:
-            parts = url.replace("https://", "").replace("http://", "").split("/")
-            if len(parts) >= 3:
-                # Skip "huggingface.co" and get org/model-name
-                return "/".join(parts[1:])
-        return None
-    except Exception:
-        return None
+    match = _HF_URL_RE.match(url)
+    return match.group(1) if match else None
 
 
 @router.post("/models/analyze", response_model=AnalyzeModelResponse)
-async def analyze_model(request: AnalyzeModelRequest):
+async def analyze_model(request: Request, body: AnalyzeModelRequest):
     """
     Analyze a model by URL. This loads the model and SAEs on-demand.
     """
-    global model_manager, sae_manager, inference_pipeline
+    state = request.app.state
+    model_store = state.model_store
+    model_loader = state.model_loader
     
     if model_store is None or model_loader is None:
         raise HTTPException(
@@ -235,13 +380,13 @@ async def analyze_model(request: AnalyzeModelRequest):
         )
 
     # Check if model was already analyzed
-    existing_model = model_store.get_model_by_url(request.model_url)
+    existing_model = model_store.get_model_by_url(body.model_url)
     if existing_model:
-        logger.info(f"Model already analyzed: {request.model_url}")
+        logger.info(f"Model already analyzed: {body.model_url}")
         return AnalyzeModelResponse(**existing_model.to_dict())
 
     # Extract model ID from URL
-    model_id = extract_model_id_from_url(request.model_url)
+    model_id = extract_model_id_from_url(body.model_url)
     if not model_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -249,7 +394,7 @@ async def analyze_model(request: AnalyzeModelRequest):
         )
 
     # Add model to store
-    model = model_store.add_model(model_url=request.model_url, model_id=model_id)
+    model = model_store.add_model(model_url=body.model_url, model_id=model_id)
 
     # Update status to analyzing
     model_store.update_model(model.id, status="analyzing")
@@ -257,19 +402,18 @@ async def analyze_model(request: AnalyzeModelRequest):
     try:
         # Load model and SAEs on-demand
         logger.info(f"Loading model {model_id} for analysis...")
-        success = model_loader.load_model_for_analysis(model_id)
+        # Loaded off the event loop and under the model lock (which also
+        # publishes the loaded instances so other endpoints can use them)
+        success = await asyncio.to_thread(
+            _load_with_model_lock, state, model_loader.load_model_for_analysis, model_id
+        )
 
         if not success:
             raise Exception("Failed to load model for analysis")
 
-        # Update global instances so other endpoints can use them
-        model_manager = model_loader.get_model_manager()
-        sae_manager = model_loader.get_sae_manager()
-        inference_pipeline = model_loader.get_inference_pipeline()
-
         # Analysis result
         analysis_result = {
-            "model_url": request.model_url,
+            "model_url": body.model_url,
             "model_id": model_id,
             "status": "analyzed",
             "message": "Model loaded and ready for evaluation",
@@ -298,10 +442,11 @@ async def analyze_model(request: AnalyzeModelRequest):
 
 
 @router.get("/models", response_model=ListModelsResponse)
-async def list_models(limit: Optional[int] = None):
+async def list_models(request: Request, limit: Optional[int] = None):
     """
     List all checked models.
     """
+    model_store = request.app.state.model_store
     if model_store is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -316,10 +461,11 @@ async def list_models(limit: Optional[int] = None):
 
 
 @router.get("/models/{model_id}", response_model=AnalyzeModelResponse)
-async def get_model(model_id: str):
+async def get_model(request: Request, model_id: str):
     """
     Get a specific checked model by ID.
     """
+    model_store = request.app.state.model_store
     if model_store is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -1,7 +1,8 @@
 """Configuration management using Pydantic Settings"""
 
 import os
-from typing import List, Optional
+from typing import Optional, Tuple
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 
@@ -20,6 +21,7 @@ class Settings(BaseSettings):
     model_id: str = "meta-llama/Llama-3.1-8B-Instruct"
     layer: int = 21
     device: str = "cuda"  # Will be auto-set to "cpu" if CUDA unavailable
+    torch_compile: bool = False  # Compile the model forward at load time (slower startup)
 
     # SAE Configuration
     sae_source_repo: str = "fnlp/Llama3_1-8B-Base-LXR-8x"
@@ -27,6 +29,7 @@ class Settings(BaseSettings):
     sae_temp_path: Optional[str] = None  # If None, uses sae_base_path + "-source"
     sae_conversion_layers: str = "0-31"  # Range or comma-separated list
     force_sae_conversion: bool = False
+    sae_conversion_workers: Optional[int] = None  # Worker processes for conversion (None = 2; each needs several GB of RAM)
 
     # Feature Detection
     quarantined_features_path: str = "../features/quarantined_features.json"
@@ -40,9 +43,20 @@ class Settings(BaseSettings):
     top_k: Optional[int] = None
     do_sample: bool = True
 
+    # Request Batching
+    max_batch_size: int = 8
+    batch_max_latency_ms: float = 20.0
+    cuda_cache_release_interval: int = 100  # Release cached CUDA memory every N generation batches (0 = never)
+
     # HuggingFace
     hf_token: Optional[str] = None
 
+    # Loading Strategy
+    enable_on_demand_loading: bool = True  # If False, model and SAEs load at startup
+
+    # Parsed sae_conversion_layers, computed once in __init__
+    _sae_conversion_layers: Tuple[int, ...] = PrivateAttr(default=())
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Auto-detect device if not explicitly set
@@ -64,15 +78,22 @@ class Settings(BaseSettings):
         if self.hf_token is None:
             self.hf_token = os.getenv("HF_TOKEN")
 
-    def get_sae_conversion_layers(self) -> List[int]:
-        """Parse sae_conversion_layers string into list of integers"""
+        # Parse the conversion layer spec once
+        self._sae_conversion_layers = self._parse_sae_conversion_layers()
+
+    def _parse_sae_conversion_layers(self) -> Tuple[int, ...]:
+        """Parse sae_conversion_layers string into a tuple of integers"""
         if "-" in self.sae_conversion_layers:
             # Range format: "0-31"
             start, end = map(int, self.sae_conversion_layers.split("-"))
-            return list(range(start, end + 1))
+            return tuple(range(start, end + 1))
         else:
             # Comma-separated: "0,1,2,21"
-            return [int(x.strip()) for x in self.sae_conversion_layers.split(",")]
+            return tuple(int(x.strip()) for x in self.sae_conversion_layers.split(","))
+
+    def get_sae_conversion_layers(self) -> Tuple[int, ...]:
+        """Get the SAE conversion layers parsed at startup"""
+        return self._sae_conversion_layers
 
 
 @lru_cache()
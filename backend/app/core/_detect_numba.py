@@ -0,0 +1,84 @@
+"""Numba kernel for quarantined feature detection on CPU"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    # fastmath is left off on purpose: it assumes no infinities, and the
+    # top-k buffers are initialized with -inf
+    @njit(parallel=True, cache=True)
+    def detect_topk_hits(activations, quarantine_sorted, top_k, threshold):
+        """
+        Select the top-k features of every row and flag quarantined ones.
+
+        Args:
+            activations: float32 array of shape [num_rows, num_features]
+            quarantine_sorted: int64 array of quarantined feature indices, ascending
+            top_k: Number of top features to keep per row
+            threshold: Minimum activation value to consider a feature "active"
+
+        Returns:
+            Tuple of (top_values [num_rows, k], top_indices [num_rows, k],
+            is_hit [num_rows, k], row_max [num_rows]) where is_hit marks
+            thresholded quarantined features and row_max is the largest
+            thresholded activation of each row (0 if none)
+        """
+        num_rows, num_features = activations.shape
+        k = max(min(top_k, num_features), 0)
+        top_values = np.full((num_rows, k), -np.inf, dtype=np.float32)
+        top_indices = np.full((num_rows, k), -1, dtype=np.int64)
+        is_hit = np.zeros((num_rows, k), dtype=np.bool_)
+        row_max = np.zeros(num_rows, dtype=np.float32)
+        if k == 0:
+            # No top-k slots: values[k - 1] below would read out of bounds
+            return top_values, top_indices, is_hit, row_max
+
+        for row in prange(num_rows):
+            values = top_values[row]
+            indices = top_indices[row]
+
+            # Insertion into a descending buffer of size k
+            for j in range(num_features):
+                value = activations[row, j]
+                if value > values[k - 1]:
+                    p = k - 1
+                    while p > 0 and values[p - 1] < value:
+                        values[p] = values[p - 1]
+                        indices[p] = indices[p - 1]
+                        p -= 1
+                    values[p] = value
+                    indices[p] = j
+
+            # Threshold, then binary-search quarantine membership
+            for i in range(k):
+                if values[i] > threshold:
+                    if values[i] > row_max[row]:
+                        row_max[row] = values[i]
+                    feature_idx = indices[i]
+                    pos = np.searchsorted(quarantine_sorted, feature_idx)
+                    if pos < quarantine_sorted.shape[0] and quarantine_sorted[pos] == feature_idx:
+                        is_hit[row, i] = True
+
+        return top_values, top_indices, is_hit, row_max
+
+
+def warmup():
+    """Compile (or load from cache) the kernel ahead of the first request"""
+    if not NUMBA_AVAILABLE:
+        return
+    logger.info("Compiling Numba detection kernel...")
+    detect_topk_hits(
+        np.zeros((1, 4), dtype=np.float32), np.zeros(1, dtype=np.int64), 2, 1e-3
+    )
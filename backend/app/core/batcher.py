@@ -0,0 +1,136 @@
+"""Dynamic Batcher: Collect concurrent requests into micro-batches"""
+
+import asyncio
+import logging
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DynamicBatcher:
+    """
+    Groups concurrently submitted items into micro-batches.
+
+    Items are queued by submit() and a background task drains the queue,
+    waiting at most max_latency_ms after the first item for the batch to fill
+    up to max_batch_size. The batch handler runs in a worker thread so the
+    event loop stays responsive while the GPU is busy.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_latency_ms: float = 20.0,
+        after_batch: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Initialize dynamic batcher.
+
+        Args:
+            handler: Blocking function mapping a list of items to a list of results
+                (same length and order)
+            max_batch_size: Maximum number of items processed together
+            max_latency_ms: Maximum time to wait for a batch to fill up
+            after_batch: Optional blocking cleanup run after results are handed
+                back, concurrently with callers building their responses but
+                before the next batch starts
+        """
+        self.handler = handler
+        self.after_batch = after_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_latency = max(0.0, max_latency_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        """Start the background batching loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+            logger.info(
+                f"Started dynamic batcher (max_batch_size={self.max_batch_size}, "
+                f"max_latency_ms={self.max_latency * 1000:.0f})"
+            )
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Submit an item and wait for its result.
+
+        Args:
+            item: Item to process
+
+        Returns:
+            Result produced by the handler for this item
+
+        Raises:
+            Exception: Whatever the handler raised for this item's batch
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Wait for the first item, then gather more until full or timed out"""
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_latency
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _loop(self):
+        """Background loop: collect batches and dispatch them to the handler"""
+        while True:
+            batch = await self._collect_batch()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+
+            logger.debug(f"Dispatching batch of {len(items)} item(s)")
+            try:
+                results = await asyncio.to_thread(self.handler, items)
+            except Exception as e:
+                logger.error(f"Batch handler failed: {e}", exc_info=True)
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                if future.done():
+                    # Caller went away (e.g. client disconnected)
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+            if self.after_batch is not None:
+                try:
+                    await asyncio.to_thread(self.after_batch)
+                except Exception as e:
+                    logger.warning(f"After-batch cleanup failed: {e}")
+
+    async def stop(self):
+        """Cancel the background loop and fail any pending items"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Batcher stopped"))
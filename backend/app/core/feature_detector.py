@@ -1,10 +1,12 @@
 """Feature Detector: Detect quarantined feature activations"""
 
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import torch
 
+from app.core import _detect_numba
 from app.models.feature_state import FeatureActivation, FeatureDetectionResult
 from app.utils.loaders import load_quarantined_features
 
@@ -26,8 +28,62 @@ class FeatureDetector:
         self.quarantined_features: Dict[int, str] = load_quarantined_features(
             quarantined_features_path
         )
+        # Sorted quarantine indices, used to build the dense membership bitmap
+        self._quarantine_indices = torch.tensor(
+            sorted(self.quarantined_features.keys()), dtype=torch.long
+        )
+        # Descriptions indexed by feature index (None for non-quarantined slots)
+        max_index = max(self.quarantined_features, default=-1)
+        self._descriptions: List[Optional[str]] = [None] * (max_index + 1)
+        for feature_index, description in self.quarantined_features.items():
+            self._descriptions[feature_index] = description
+        # Quarantine bitmap covering indices up to the largest quarantined one
+        self._quarantine_bitmap_cpu = torch.zeros(max_index + 1, dtype=torch.bool)
+        self._quarantine_bitmap_cpu[self._quarantine_indices] = True
+        # Dense quarantine bitmaps, cached per (num_features, device)
+        self._quarantine_bitmaps: Dict[Tuple[int, torch.device], torch.Tensor] = {}
+        # Device-resident copies of the sorted quarantine indices
+        self._quarantine_indices_by_device: Dict[torch.device, torch.Tensor] = {}
+        # Sorted indices as a NumPy array for the Numba CPU kernel
+        self._quarantine_indices_np: np.ndarray = self._quarantine_indices.numpy()
         logger.info(f"Initialized FeatureDetector with {len(self.quarantined_features)} quarantined features")
 
+    def _ensure_bitmap(self, num_features: int, device: torch.device) -> torch.Tensor:
+        """
+        Get a dense boolean bitmap of length num_features marking quarantined features.
+
+        Membership then becomes an indexed tensor read instead of a dict lookup.
+
+        Args:
+            num_features: SAE dictionary size
+            device: Device the bitmap should live on
+
+        Returns:
+            Boolean tensor of shape [num_features]
+        """
+        key = (num_features, device)
+        bitmap = self._quarantine_bitmaps.get(key)
+        if bitmap is None:
+            bitmap = torch.zeros(num_features, dtype=torch.bool)
+            overlap = min(num_features, self._quarantine_bitmap_cpu.numel())
+            bitmap[:overlap] = self._quarantine_bitmap_cpu[:overlap]
+            bitmap = bitmap.to(device)
+            self._quarantine_bitmaps[key] = bitmap
+        return bitmap
+
+    def _quarantine_indices_on(self, device: torch.device) -> torch.Tensor:
+        """Get the sorted quarantine indices on a device, uploading them only once"""
+        indices = self._quarantine_indices_by_device.get(device)
+        if indices is None:
+            indices = self._quarantine_indices.to(device)
+            self._quarantine_indices_by_device[device] = indices
+        return indices
+
+    def warmup(self):
+        """Compile the Numba CPU kernel ahead of the first request (if available)"""
+        _detect_numba.warmup()
+
+    @torch.inference_mode()
     def detect_quarantined_activations(
         self,
         feature_activations: torch.Tensor,
@@ -58,69 +114,150 @@ class FeatureDetector:
 
         seq_len, num_features = feature_activations.shape
 
-        # Determine which token positions to analyze
+        # Determine which token positions to analyze. Negative positions count
+        # from the end as in Python indexing; out-of-range positions are
+        # dropped. Both happen on the host, so no device sync is needed.
+        device = feature_activations.device
         if token_positions is None:
-            token_positions = list(range(seq_len))
+            pos_t = torch.arange(seq_len, device=device)
+        else:
+            pos_t = torch.as_tensor(token_positions, dtype=torch.long)
+            pos_t = (pos_t[(pos_t >= -seq_len) & (pos_t < seq_len)] % seq_len).to(device)
+        num_positions = pos_t.numel()
 
         activated_features: List[FeatureActivation] = []
         max_activation = 0.0
 
-        # Analyze each token position
-        for token_pos in token_positions:
-            if token_pos >= seq_len:
-                continue
-
-            # Get activations for this token position
-            token_activations = feature_activations[token_pos]
-
-            # Get top-k activated features (matching notebook's get_activated_features)
-            # Sort by magnitude, take top-k, then filter by threshold
-            sorted_magnitude, sorted_indices = torch.sort(token_activations, descending=True)
-            sorted_magnitude = sorted_magnitude[:top_k]
-            sorted_indices = sorted_indices[:top_k]
-            
-            # Filter by threshold (as in notebook: mask = sorted_magnitude > 1e-3)
-            mask = sorted_magnitude > self.activation_threshold
-            filtered_magnitude = sorted_magnitude[mask]
-            filtered_indices = sorted_indices[mask]
-
-            # Check if any filtered features are quarantined
-            for value, idx in zip(filtered_magnitude, filtered_indices):
-                feature_idx = idx.item()
-                activation_value = value.item()
-
-                max_activation = max(max_activation, activation_value)
-
-                # Check if this feature is quarantined
-                if feature_idx in self.quarantined_features:
-                    activated_features.append(
-                        FeatureActivation(
-                            feature_index=feature_idx,
-                            activation_value=activation_value,
-                            description=self.quarantined_features[feature_idx],
-                            layer=layer,
-                            token_position=token_pos,
-                        )
-                    )
+        if pos_t.numel() > 0 and num_features > 0:
+            # Gather all requested rows at once
+            rows = feature_activations.index_select(0, pos_t)
 
-        # Remove duplicates (same feature activated at multiple positions)
-        # Keep the one with highest activation
-        unique_features: Dict[int, FeatureActivation] = {}
-        for feat in activated_features:
-            if feat.feature_index not in unique_features:
-                unique_features[feat.feature_index] = feat
-            elif feat.activation_value > unique_features[feat.feature_index].activation_value:
-                unique_features[feat.feature_index] = feat
+            if device.type == "cpu" and _detect_numba.NUMBA_AVAILABLE:
+                hits, max_activation = self._find_hits_numba(rows, pos_t, top_k)
+            else:
+                hits, max_activation = self._find_hits_torch(rows, pos_t, top_k)
 
-        activated_features = list(unique_features.values())
+            descriptions = self._descriptions
+            activated_features = [
+                FeatureActivation(
+                    feature_idx, activation_value, descriptions[feature_idx], layer, token_pos
+                )
+                for feature_idx, activation_value, token_pos in hits
+            ]
 
         return FeatureDetectionResult(
             has_quarantined_features=len(activated_features) > 0,
             activated_features=activated_features,
-            total_features_checked=len(token_positions) * top_k,
+            total_features_checked=num_positions * top_k,
             max_activation_value=max_activation,
         )
 
+    def _find_hits_torch(
+        self, rows: torch.Tensor, pos_t: torch.Tensor, top_k: int
+    ) -> Tuple[List[Tuple[int, float, int]], float]:
+        """
+        Find deduplicated quarantined hits with batched tensor ops.
+
+        Args:
+            rows: Activations of the analyzed positions, shape [num_positions, num_features]
+            pos_t: Token position of each row, shape [num_positions]
+            top_k: Number of top features to check per token position
+
+        Returns:
+            Tuple of ((feature_index, activation_value, token_position) hits,
+            max thresholded activation)
+        """
+        num_features = rows.shape[1]
+        device = rows.device
+
+        # Get top-k activated features for every position in a single call
+        # (matching notebook's get_activated_features), then filter by
+        # threshold (as in notebook: mask = sorted_magnitude > 1e-3)
+        vals, idxs = torch.topk(rows, k=min(top_k, num_features), dim=-1)
+        thresh_mask = vals > self.activation_threshold
+        max_activation_t = torch.where(thresh_mask, vals, torch.zeros_like(vals)).amax()
+
+        # Keep only thresholded features that are quarantined
+        q_mask = self._ensure_bitmap(num_features, device)[idxs] & thresh_mask
+        hit_feats = idxs[q_mask]
+        hit_vals = vals[q_mask]
+        hit_pos = pos_t.unsqueeze(1).expand_as(idxs)[q_mask]
+
+        # Remove duplicates (same feature activated at multiple positions)
+        # Keep the earliest position with the highest activation. Reductions
+        # run in the compact quarantine-index space rather than over all features.
+        quarantine_indices = self._quarantine_indices_on(device)
+        num_quarantined = quarantine_indices.numel()
+        compact_ids = torch.searchsorted(quarantine_indices, hit_feats)
+        num_hits = hit_feats.numel()
+
+        best_vals = torch.full(
+            (num_quarantined,), float("-inf"), dtype=hit_vals.dtype, device=device
+        )
+        best_vals.scatter_reduce_(0, compact_ids, hit_vals, reduce="amax")
+        is_best = hit_vals == best_vals[compact_ids]
+
+        # Second pass: first hit (in position order) reaching each feature's max
+        first_best = torch.full((num_quarantined,), num_hits, dtype=torch.long, device=device)
+        first_best.scatter_reduce_(
+            0,
+            compact_ids[is_best],
+            torch.arange(num_hits, device=device)[is_best],
+            reduce="amin",
+        )
+        # first_best is indexed by feature; sort so hits come back in
+        # first-appearance order, matching the Numba path
+        keep = first_best[first_best < num_hits].sort().values
+
+        # Move only the reduced hits to the host, with a single sync on CUDA
+        packed = torch.stack(
+            [hit_feats[keep].double(), hit_vals[keep].double(), hit_pos[keep].double()]
+        )
+        if device.type == "cuda":
+            packed = packed.to("cpu", non_blocking=True)
+            max_activation_t = max_activation_t.to("cpu", non_blocking=True)
+            torch.cuda.current_stream(device).synchronize()
+        feats, values, token_positions = packed.tolist()
+
+        hits = [
+            (int(feature_idx), activation_value, int(token_pos))
+            for feature_idx, activation_value, token_pos in zip(feats, values, token_positions)
+        ]
+        return hits, max_activation_t.item()
+
+    def _find_hits_numba(
+        self, rows: torch.Tensor, pos_t: torch.Tensor, top_k: int
+    ) -> Tuple[List[Tuple[int, float, int]], float]:
+        """
+        Find deduplicated quarantined hits with the Numba CPU kernel.
+
+        Same contract as _find_hits_torch, but skips PyTorch op dispatch entirely.
+        """
+        positions = pos_t.tolist()
+        if rows.dtype != torch.float32:
+            rows = rows.float()
+        top_values, top_indices, is_hit, row_max = _detect_numba.detect_topk_hits(
+            np.ascontiguousarray(rows.numpy()),
+            self._quarantine_indices_np,
+            top_k,
+            float(self.activation_threshold),
+        )
+
+        # Remove duplicates (same feature activated at multiple positions)
+        # Keep the earliest position with the highest activation
+        best: Dict[int, Tuple[float, int]] = {}
+        for row, rank in zip(*np.nonzero(is_hit)):
+            feature_idx = int(top_indices[row, rank])
+            activation_value = float(top_values[row, rank])
+            if feature_idx not in best or activation_value > best[feature_idx][0]:
+                best[feature_idx] = (activation_value, positions[row])
+
+        hits = [
+            (feature_idx, activation_value, token_pos)
+            for feature_idx, (activation_value, token_pos) in best.items()
+        ]
+        return hits, float(row_max.max())
+
     def get_feature_description(self, feature_index: int) -> Optional[str]:
         """
         Get description for a feature index.
@@ -131,5 +268,7 @@ class FeatureDetector:
         Returns:
             Description string, or None if not found
         """
-        return self.quarantined_features.get(feature_index)
+        if 0 <= feature_index < len(self._descriptions):
+            return self._descriptions[feature_index]
+        return None
 
@@ -1,7 +1,10 @@
 """Inference Pipeline: Generate text and detect feature activations"""
 
 import logging
-from typing import Any, Dict, List, Optional
+from dataclasses import replace
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import torch
 
@@ -9,11 +12,21 @@ from app.config import Settings
 from app.core.feature_detector import FeatureDetector
 from app.core.model_manager import ModelManager
 from app.core.sae_manager import SAEManager
+from app.models.feature_state import FeatureDetectionResult
 from app.models.model_state import InferenceResult
 from app.utils.import_utils import import_lm_saes
 
 logger = logging.getLogger(__name__)
 
+# Longest prompt + generated sequence probed for feature activations
+_MAX_PROBE_LENGTH = 1024
+
+
+@lru_cache(maxsize=None)
+def _resid_post_hook_name(layer: int) -> str:
+    """Name of the residual-stream hook point probed at a layer"""
+    return f"blocks.{layer}.hook_resid_post"
+
 
 class InferencePipeline:
     """Orchestrates inference with feature detection"""
@@ -30,19 +43,27 @@ class InferencePipeline:
         self.feature_detector = feature_detector
         self.settings = settings
         self.device = settings.device
-        self._imports = None  # Lazy-loaded imports
+        self._device = torch.device(settings.device) if isinstance(settings.device, str) else settings.device
+        # Default generation parameters (read-only; settings changes need a new pipeline)
+        self._base_gen_config = MappingProxyType(
+            {
+                "max_new_tokens": settings.max_new_tokens,
+                "temperature": settings.temperature,
+                "top_p": settings.top_p,
+                "top_k": settings.top_k,
+                "do_sample": settings.do_sample,
+            }
+        )
 
     def _ensure_imports(self):
-        """Lazy load Language-Model-SAEs imports"""
-        if self._imports is None:
-            imports = import_lm_saes()
-            if imports is None:
-                raise ImportError(
-                    "Failed to import Language-Model-SAEs. "
-                    "Please run: python setup_dependencies.py"
-                )
-            self._imports = imports
-        return self._imports
+        """Lazy load Language-Model-SAEs imports (cached by import_lm_saes)"""
+        imports = import_lm_saes()
+        if imports is None:
+            raise ImportError(
+                "Failed to import Language-Model-SAEs. "
+                "Please run: python setup_dependencies.py"
+            )
+        return imports
 
     def generate_with_probing(
         self,
@@ -73,17 +94,111 @@ class InferencePipeline:
 
         logger.info(f"Generating text for prompt (length: {len(prompt)})")
 
-        # Step 1: Generate text (normal inference)
-        generated_text = self._generate_text(model, tokenizer, prompt, gen_config)
+        # Step 1: Generate text, capturing layer activations in the same pass
+        generated_text, activations, prompt_length = self._generate_text(
+            model, tokenizer, prompt, gen_config, layer
+        )
         logger.info(f"Generated text (length: {len(generated_text)})")
 
-        # Step 2: Create full sequence (prompt + generated)
-        full_sequence = prompt + generated_text
+        return self._probe_generated(prompt, generated_text, activations, prompt_length, layer)
+
+    def generate_with_probing_batch(
+        self,
+        prompts: Union[str, List[str]],
+        layers: Optional[List[Optional[int]]] = None,
+        generation_configs: Optional[List[Optional[Dict[str, Any]]]] = None,
+    ) -> List[Union[InferenceResult, Exception]]:
+        """
+        Generate text for several prompts at once and probe each result.
+
+        Prompts that share the same layer and generation config are tokenized
+        together and generated in a single left-padded generate() call; probing
+        then runs per sequence. Errors are returned in the failing prompts'
+        slots rather than raised, so one bad request doesn't fail the others.
+
+        Args:
+            prompts: Input prompts (a single string takes the unbatched path)
+            layers: Per-prompt layer to probe (None entries default to settings.layer)
+            generation_configs: Per-prompt optional generation parameters
+
+        Returns:
+            InferenceResult (or the Exception it failed with) for each prompt,
+            in input order
+        """
+        if isinstance(prompts, str):
+            return [
+                self.generate_with_probing(
+                    prompts,
+                    layer=layers[0] if layers else None,
+                    generation_config=generation_configs[0] if generation_configs else None,
+                )
+            ]
+
+        num_prompts = len(prompts)
+        if layers is None:
+            layers = [None] * num_prompts
+        if generation_configs is None:
+            generation_configs = [None] * num_prompts
+        layers = [layer if layer is not None else self.settings.layer for layer in layers]
+
+        model = self.model_manager.get_model()
+        tokenizer = model.tokenizer
+
+        # Group prompts by layer and generation config so each group is one
+        # generate() call with a single capture hook
+        gen_configs = [self._prepare_generation_config(c) for c in generation_configs]
+        groups: Dict[Tuple, List[int]] = {}
+        for i, gen_config in enumerate(gen_configs):
+            key = (layers[i], tuple(sorted(gen_config.items())))
+            groups.setdefault(key, []).append(i)
 
-        # Step 3: Re-run model with run_with_cache to capture activations
-        logger.info(f"Probing layer {layer} for feature activations")
-        activations = self._capture_activations(model, tokenizer, full_sequence, layer)
+        logger.info(f"Generating text for batch of {num_prompts} prompts ({len(groups)} group(s))")
 
+        # A failure only fails the prompts it belongs to: a group that fails to
+        # generate fails all of its prompts, a probe failure fails one prompt
+        results: List[Union[InferenceResult, Exception]] = [None] * num_prompts
+        for indices in groups.values():
+            try:
+                outputs = self._generate_text_batch(
+                    model,
+                    tokenizer,
+                    [prompts[i] for i in indices],
+                    gen_configs[indices[0]],
+                    layers[indices[0]],
+                )
+            except Exception as e:
+                logger.error(f"Generation failed for group of {len(indices)} prompt(s): {e}", exc_info=True)
+                for i in indices:
+                    results[i] = e
+                continue
+
+            for i, output in zip(indices, outputs):
+                try:
+                    results[i] = self._probe_generated(prompts[i], *output, layers[i])
+                except Exception as e:
+                    logger.error(f"Probing failed for prompt {i}: {e}", exc_info=True)
+                    results[i] = e
+
+        return results
+
+    def _probe_generated(
+        self,
+        prompt: str,
+        generated_text: str,
+        activations: Optional[torch.Tensor],
+        prompt_length: int,
+        layer: int,
+    ) -> InferenceResult:
+        """
+        Encode captured activations and detect quarantined features.
+
+        Args:
+            prompt: Input prompt
+            generated_text: Decoded generated text
+            activations: Captured activations [1, seq_len, d_model], or None
+            prompt_length: Number of prompt tokens (index of the first generated token)
+            layer: Layer the activations were captured at
+        """
         if activations is None:
             logger.warning("Failed to capture activations")
             return InferenceResult(
@@ -95,29 +210,10 @@ class InferencePipeline:
                 warnings=["Failed to capture activations for feature detection"],
             )
 
-        # Step 4: Encode activations through SAE
-        feature_activations = self.sae_manager.encode_activations(layer, activations)
-
-        # Step 5: Check for quarantined features
+        # Step 2: Pick the token positions to check
         # Only check first token after prompt and last token of generated text
-        # Get sequence length from feature activations
-        if feature_activations.dim() == 3:
-            seq_len = feature_activations.shape[1]
-        else:
-            seq_len = feature_activations.shape[0]
-        
-        # Lazy load imports
-        _, _, _, _, to_tokens, _ = self._ensure_imports()
+        seq_len = activations.shape[1]
 
-        # Tokenize prompt to find where generated text starts
-        prompt_tokens = to_tokens(
-            tokenizer=tokenizer,
-            text=prompt,
-            prepend_bos=False,
-            max_length=1024,
-        )
-        prompt_length = prompt_tokens.shape[-1] if prompt_tokens.dim() > 0 else len(prompt_tokens)
-        
         # First token after prompt (first generated token) and last token position
         first_token_after_prompt = prompt_length
         last_token = seq_len - 1
@@ -133,13 +229,36 @@ class InferencePipeline:
             f"Checking quarantined features at token positions: {token_positions} "
             f"(first after prompt: {first_token_after_prompt}, last: {last_token}, seq_len: {seq_len})"
         )
-        
-        detection_result = self.feature_detector.detect_quarantined_activations(
-            feature_activations,
-            layer=layer,
-            top_k=self.settings.feature_top_k,
-            token_positions=token_positions if token_positions else [first_token_after_prompt],
-        )
+
+        # Step 3: Encode only those positions through the SAE. SAE encoding is
+        # per token, so this matches encoding the whole sequence while the
+        # [seq_len, num_features] output shrinks to at most two rows.
+        if token_positions:
+            logger.info(f"Probing layer {layer} for feature activations")
+            feature_activations = self.sae_manager.encode_activations(
+                layer, activations[:, token_positions]
+            )
+
+            # Step 4: Check for quarantined features (rows are indexed 0..n-1
+            # here and mapped back to sequence positions below)
+            detection_result = self.feature_detector.detect_quarantined_activations(
+                feature_activations,
+                layer=layer,
+                top_k=self.settings.feature_top_k,
+                token_positions=list(range(len(token_positions))),
+            )
+            detection_result.activated_features = [
+                replace(feature, token_position=token_positions[feature.token_position])
+                for feature in detection_result.activated_features
+            ]
+        else:
+            # Nothing was generated inside the probe window
+            detection_result = FeatureDetectionResult(
+                has_quarantined_features=False,
+                activated_features=[],
+                total_features_checked=self.settings.feature_top_k,
+                max_activation_value=0.0,
+            )
 
         logger.info(
             f"Feature detection complete: {len(detection_result.activated_features)} "
@@ -159,9 +278,15 @@ class InferencePipeline:
         )
 
     def _generate_text(
-        self, model, tokenizer, prompt: str, gen_config: Dict[str, Any]
-    ) -> str:
-        """Generate text from prompt"""
+        self, model, tokenizer, prompt: str, gen_config: Dict[str, Any], layer: int
+    ) -> Tuple[str, Optional[torch.Tensor], int]:
+        """
+        Generate text from prompt and capture activations at the given layer.
+
+        Returns:
+            Tuple of (generated_text, activations of shape [1, seq_len, d_model],
+            prompt token count)
+        """
         # Lazy load imports
         _, _, _, _, to_tokens, _ = self._ensure_imports()
 
@@ -174,105 +299,206 @@ class InferencePipeline:
         )
 
         # Move tokens to device (ensure same device as model)
-        device = torch.device(self.device) if isinstance(self.device, str) else self.device
-        tokens = tokens.to(device)
+        tokens = self._move_to_device(tokens)
 
-        # Generate using the underlying transformer model
-        # LanguageModel wraps a HookedTransformer, accessible via model.model
-        with torch.no_grad():
-            # Use the underlying transformer's generate method
-            # The LanguageModel.model is a HookedTransformer from transformer_lens
-            underlying_model = model.model
-
-            # Generate with the specified parameters
-            output = underlying_model.generate(
-                tokens,
-                max_new_tokens=gen_config["max_new_tokens"],
-                temperature=gen_config.get("temperature"),
-                top_p=gen_config.get("top_p"),
-                top_k=gen_config.get("top_k"),
-                do_sample=gen_config.get("do_sample", True),
-                verbose=False,
+        output, activations = self._generate_with_capture(model, tokens, gen_config, layer)
+
+        # Decode generated tokens (exclude input tokens)
+        # HookedTransformer.generate always returns [batch, seq_len]
+        generated_tokens = output[0, tokens.shape[1] :]
+        generated_text = tokenizer.decode(generated_tokens.tolist(), skip_special_tokens=True)
+
+        if activations is not None:
+            activations = self._trim_activations(
+                activations[0:1], generated_tokens, 0, tokens.shape[1], tokenizer.eos_token_id
             )
 
-            # Decode generated tokens (exclude input tokens)
-            # Output shape: [batch, seq_len] - take first batch
-            if output.dim() == 2:
-                generated_tokens = output[0][tokens.shape[1] :]
-            else:
-                generated_tokens = output[tokens.shape[1] :]
+        return generated_text, activations, tokens.shape[1]
 
-            generated_text = tokenizer.decode(generated_tokens, skip_special_tokens=True)
+    def _generate_text_batch(
+        self,
+        model,
+        tokenizer,
+        prompts: List[str],
+        gen_config: Dict[str, Any],
+        layer: int,
+    ) -> List[Tuple[str, Optional[torch.Tensor], int]]:
+        """Generate text for several prompts with one tokenizer call and one left-padded generate() call"""
+        # Left-pad so every prompt ends where generation starts. HookedTransformer
+        # derives the attention mask from the pad tokens when padding_side is "left".
+        original_padding_side = tokenizer.padding_side
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
 
-        return generated_text
+        try:
+            encoded = tokenizer(
+                prompts,
+                padding=True,
+                truncation=True,
+                max_length=512,
+                add_special_tokens=False,
+                return_tensors="pt",
+            )
+            tokens = self._move_to_device(encoded["input_ids"])
+            output, activations = self._generate_with_capture(model, tokens, gen_config, layer)
+        finally:
+            tokenizer.padding_side = original_padding_side
 
-    def _capture_activations(
-        self, model, tokenizer, text: str, layer: int
-    ) -> Optional[torch.Tensor]:
+        # Decode generated tokens (exclude padded input tokens)
+        padded_length = tokens.shape[1]
+        generated_tokens = output[:, padded_length:]
+        texts = tokenizer.batch_decode(generated_tokens.tolist(), skip_special_tokens=True)
+
+        prompt_lengths = encoded["attention_mask"].sum(dim=1).tolist()
+        if activations is None:
+            return [(text, None, prompt_lengths[i]) for i, text in enumerate(texts)]
+
+        # Strip each row's left padding so positions line up with its own prompt
+        return [
+            (
+                text,
+                self._trim_activations(
+                    activations[i : i + 1],
+                    generated_tokens[i],
+                    padded_length - prompt_lengths[i],
+                    padded_length,
+                    tokenizer.eos_token_id,
+                ),
+                prompt_lengths[i],
+            )
+            for i, text in enumerate(texts)
+        ]
+
+    def _move_to_device(self, tokens: torch.Tensor) -> torch.Tensor:
         """
-        Capture activations at specified layer using run_with_cache.
-        
-        This matches the notebook implementation which uses model.model.run_with_cache()
-        to efficiently capture activations at specific hook points.
+        Copy CPU token ids to the model device.
+
+        On CUDA the copy goes through pinned memory with non_blocking=True so
+        it overlaps with host-side work; generate() launches its kernels on
+        the same stream, which orders them after the copy.
         """
-        # Lazy load imports
-        _, _, _, _, to_tokens, _ = self._ensure_imports()
+        if self._device.type == "cuda":
+            return tokens.pin_memory().to(self._device, non_blocking=True)
+        return tokens.to(self._device)
 
-        try:
-            # Tokenize
-            tokens = to_tokens(
-                tokenizer=tokenizer,
-                text=text,
-                prepend_bos=False,
-                max_length=1024,
-            )
+    def _generate_with_capture(
+        self, model, tokens: torch.Tensor, gen_config: Dict[str, Any], layer: int
+    ) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+        """
+        Run generate() with a hook that records resid_post activations at a layer.
 
-            # Move to device (ensure same device as model)
-            device = torch.device(self.device) if isinstance(self.device, str) else self.device
-            tokens = tokens.to(device)
+        The prefill forward records the prompt positions and every decode step
+        appends one position, so a single pass yields both the output tokens
+        and the activations a separate run_with_cache pass would compute. The
+        last sampled token is only fed back if generation continues, so one
+        extra token is generated (a single cached decode step) and dropped.
+        The KV cache and per-step buffers are local to this call, so they are
+        back in the allocator before SAE encoding starts and peak memory is
+        that of generation alone.
 
-            # Use run_with_cache to capture activations (as in notebook)
-            # This is more efficient than using hooks
-            hook_point = f"blocks.{layer}.hook_resid_post"
-            
-            with torch.no_grad():
-                _, activations = model.model.run_with_cache(
+        Returns:
+            Tuple of (output token ids [batch, seq_len], activations
+            [batch, seq_len, d_model] in bfloat16 covering every output token,
+            or None if nothing was captured)
+        """
+        # Generate using the underlying transformer model
+        # LanguageModel wraps a HookedTransformer, accessible via model.model
+        underlying_model = model.model
+
+        hook_name = _resid_post_hook_name(layer)
+        hook_point = underlying_model.hook_dict.get(hook_name)
+        if hook_point is None:
+            logger.error(f"Hook point '{hook_name}' not found in model")
+
+        captured: List[torch.Tensor] = []
+        if hook_point is not None:
+            # Cast to bfloat16 as each step is recorded (as in notebook), so the
+            # stored activations and the concatenation below move half the bytes.
+            # Models already running in bfloat16 skip the cast entirely.
+            def record(act: torch.Tensor, hook) -> None:
+                act = act.detach()
+                if act.dtype != torch.bfloat16:
+                    act = act.to(torch.bfloat16)
+                captured.append(act)
+
+            hook_point.add_hook(record)
+
+        # generate() never feeds its last sampled token back through the model,
+        # so sample one extra token (dropped below) to record the last kept
+        # token's activation; otherwise the "last token" check would see the
+        # second-to-last token and max_new_tokens=1 would probe nothing generated
+        max_new_tokens = gen_config["max_new_tokens"]
+
+        try:
+            # No sdpa_kernel() backend selection here: HookedTransformer computes
+            # attention explicitly (so hook_attn_scores/hook_pattern can fire)
+            # rather than through F.scaled_dot_product_attention
+            with torch.inference_mode():
+                # Generate with the specified parameters
+                output = underlying_model.generate(
                     tokens,
-                    names_filter=[hook_point]
+                    max_new_tokens=max_new_tokens + 1,
+                    temperature=gen_config.get("temperature"),
+                    top_p=gen_config.get("top_p"),
+                    top_k=gen_config.get("top_k"),
+                    do_sample=gen_config.get("do_sample", True),
+                    verbose=False,
                 )
+        finally:
+            # Always detach the hook so it can't fire on later forwards
+            if hook_point is not None:
+                hook_point.remove_hooks()
+
+        # Drop the extra token. If every sequence hit EOS first, generation
+        # stopped early and there is nothing to drop.
+        output = output[:, : tokens.shape[1] + max_new_tokens]
+
+        if not captured:
+            return output, None
+
+        activations = torch.cat(captured, dim=1)
+        return output, activations
+
+    @staticmethod
+    def _trim_activations(
+        activations: torch.Tensor,
+        generated_tokens: torch.Tensor,
+        start: int,
+        prompt_end: int,
+        eos_token_id: Optional[int],
+    ) -> torch.Tensor:
+        """
+        Cut one sequence's captured activations down to its prompt + generated text.
 
-            # Extract activations for the specified layer
-            # ActivationCache is accessed like a dictionary with [] not .get()
-            try:
-                layer_activations = activations[hook_point]
-            except KeyError:
-                logger.error(f"Hook point '{hook_point}' not found in activations cache")
-                return None
-
-            # Convert to bfloat16 and ensure on correct device (as in notebook)
-            device = torch.device(self.device) if isinstance(self.device, str) else self.device
-            layer_activations = layer_activations.to(device).to(torch.bfloat16)
+        Tokens from EOS onwards (EOS itself plus batch padding) are not part of
+        the decoded text, so their activations are dropped. Sequences longer
+        than _MAX_PROBE_LENGTH are truncated to their first _MAX_PROBE_LENGTH
+        positions.
 
-            return layer_activations
+        Args:
+            activations: Captured activations for one sequence, [1, captured_len, d_model]
+            generated_tokens: Generated token ids of that sequence
+            start: Index of the first real (non-pad) prompt token
+            prompt_end: Index where generated tokens start
+            eos_token_id: Tokenizer EOS id (None if the tokenizer has none)
 
-        except Exception as e:
-            logger.error(f"Error capturing activations: {e}", exc_info=True)
-            return None
+        Returns:
+            Contiguous activations of shape [1, seq_len, d_model], the layout
+            SAEManager.encode_activations expects
+        """
+        num_generated = generated_tokens.shape[-1]
+        if eos_token_id is not None:
+            eos_positions = (generated_tokens == eos_token_id).nonzero()
+            if eos_positions.numel() > 0:
+                num_generated = int(eos_positions[0, 0])
+        end = min(prompt_end + num_generated, start + _MAX_PROBE_LENGTH)
+        # A no-op for the usual single-row slice, but guarantees the layout
+        return activations[:, start:end].contiguous()
 
     def _prepare_generation_config(
         self, user_config: Optional[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Prepare generation configuration"""
-        config = {
-            "max_new_tokens": self.settings.max_new_tokens,
-            "temperature": self.settings.temperature,
-            "top_p": self.settings.top_p,
-            "top_k": self.settings.top_k,
-            "do_sample": self.settings.do_sample,
-        }
-
-        if user_config:
-            config.update(user_config)
-
-        return config
+        return {**self._base_gen_config, **(user_config or {})}
 
@@ -1,6 +1,8 @@
 """Lazy loader for models and SAEs - initializes on-demand"""
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from app.config import Settings
@@ -23,40 +25,49 @@ class ModelLoader:
         self.sae_manager: Optional[SAEManager] = None
         self.inference_pipeline: Optional[InferencePipeline] = None
         self._saes_converted = False
+        # Separate locks so conversion and model loading can run concurrently
+        # while each stays idempotent across callers
+        self._convert_lock = threading.Lock()
+        self._model_lock = threading.Lock()
 
     def ensure_saes_converted(self) -> bool:
         """Ensure SAEs are converted (idempotent)"""
         if self._saes_converted:
             return True
 
-        logger.info("Converting SAEs (one-time, idempotent)...")
-        try:
-            converter = SAEConverter(self.settings)
-            layers = self.settings.get_sae_conversion_layers()
-            success = converter.convert_saes(
-                layers=layers, force=self.settings.force_sae_conversion
-            )
-            if not success:
-                logger.warning("SAE conversion had some failures, but continuing...")
-            self._saes_converted = True
-            return True
-        except Exception as e:
-            logger.error(f"SAE conversion error: {e}", exc_info=True)
-            raise
+        with self._convert_lock:
+            if self._saes_converted:
+                return True
+
+            logger.info("Converting SAEs (one-time, idempotent)...")
+            try:
+                converter = SAEConverter(self.settings)
+                layers = self.settings.get_sae_conversion_layers()
+                success = converter.convert_saes(
+                    layers=layers, force=self.settings.force_sae_conversion
+                )
+                if not success:
+                    logger.warning("SAE conversion had some failures, but continuing...")
+                self._saes_converted = True
+                return True
+            except Exception as e:
+                logger.error(f"SAE conversion error: {e}", exc_info=True)
+                raise
 
     def ensure_model_loaded(self, model_id: Optional[str] = None) -> ModelManager:
         """Ensure model is loaded, loading if necessary"""
-        if self.model_manager is None:
-            logger.info("Initializing ModelManager...")
-            self.model_manager = ModelManager(self.settings)
+        with self._model_lock:
+            if self.model_manager is None:
+                logger.info("Initializing ModelManager...")
+                self.model_manager = ModelManager(self.settings)
 
-        if not self.model_manager.is_loaded():
-            model_id_to_load = model_id or self.settings.model_id
-            logger.info(f"Loading model: {model_id_to_load}")
-            self.model_manager.load_model(model_id_to_load)
-            logger.info("Model loaded successfully")
+            if not self.model_manager.is_loaded():
+                model_id_to_load = model_id or self.settings.model_id
+                logger.info(f"Loading model: {model_id_to_load}")
+                self.model_manager.load_model(model_id_to_load)
+                logger.info("Model loaded successfully")
 
-        return self.model_manager
+            return self.model_manager
 
     def ensure_sae_loaded(self, layer: Optional[int] = None) -> SAEManager:
         """Ensure SAE manager is initialized and SAE is loaded for the layer"""
@@ -102,16 +113,18 @@ class ModelLoader:
             True if successful, False otherwise
         """
         try:
-            # Step 1: Convert SAEs if needed
-            self.ensure_saes_converted()
-
-            # Step 2: Load the model
-            self.ensure_model_loaded(model_id)
-
-            # Step 3: Load SAE for default layer
+            # Step 1: Convert SAEs (CPU/disk-bound) and load the model
+            # (network/GPU-bound) concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                convert_future = executor.submit(self.ensure_saes_converted)
+                model_future = executor.submit(self.ensure_model_loaded, model_id)
+                convert_future.result()
+                model_future.result()
+
+            # Step 2: Load SAE for default layer
             self.ensure_sae_loaded()
 
-            # Step 4: Initialize inference pipeline
+            # Step 3: Initialize inference pipeline
             self.ensure_inference_pipeline()
 
             logger.info(f"Model {model_id} ready for analysis")
@@ -21,19 +21,17 @@ class ModelManager:
         self.model = None  # Will be LanguageModel when loaded
         self.current_model_id: Optional[str] = None  # Track currently loaded model
         self.device = settings.device
-        self._imports = None  # Lazy-loaded imports
+        self._clears_since_release = 0  # State clears since the CUDA cache was last released
 
     def _ensure_imports(self):
-        """Lazy load Language-Model-SAEs imports"""
-        if self._imports is None:
-            imports = import_lm_saes()
-            if imports is None:
-                raise ImportError(
-                    "Failed to import Language-Model-SAEs. "
-                    "Please run: python setup_dependencies.py"
-                )
-            self._imports = imports
-        return self._imports
+        """Lazy load Language-Model-SAEs imports (cached by import_lm_saes)"""
+        imports = import_lm_saes()
+        if imports is None:
+            raise ImportError(
+                "Failed to import Language-Model-SAEs. "
+                "Please run: python setup_dependencies.py"
+            )
+        return imports
 
     def load_model(self, model_id: Optional[str] = None):
         """
@@ -88,6 +86,13 @@ class ModelManager:
             else:
                 self.device = "cpu"
                 logger.info(f"Model on CPU")
+
+            # Inference only: disable dropout and other training behaviour
+            self.model.model.eval()
+
+            # Compile the forward pass (opt-in, compile time is paid here)
+            if self.settings.torch_compile:
+                self._compile_model()
             
             # Track the loaded model ID
             self.current_model_id = model_id
@@ -99,6 +104,37 @@ class ModelManager:
             logger.error(f"Failed to load model {model_id}: {e}")
             raise
 
+    def _compile_model(self):
+        """
+        Compile the underlying HookedTransformer's forward with torch.compile.
+
+        The forward is compiled in place rather than wrapping the module, so
+        generate() and run_with_cache() (which call self(...) internally) pick
+        up the compiled version and hook points stay reachable. Shapes are
+        marked dynamic because the KV cache grows on every decode step.
+
+        CUDA graphs ("reduce-overhead") are not used: HookedTransformer's KV
+        cache is extended with torch.cat on every step, so each decode step has
+        a new shape and cudagraph trees would record a new graph per length.
+        A short generate() call compiles both the prefill and the
+        single-token decode graphs before the first request.
+        """
+        underlying_model = self.model.model
+        logger.info("Compiling model forward with torch.compile")
+        underlying_model.forward = torch.compile(
+            underlying_model.forward, mode="default", fullgraph=False, dynamic=True
+        )
+
+        device = next(underlying_model.parameters()).device
+        with torch.inference_mode():
+            underlying_model.generate(
+                torch.zeros((1, 16), dtype=torch.long, device=device),
+                max_new_tokens=2,
+                do_sample=False,
+                verbose=False,
+            )
+        logger.info("Model compiled and warmed up")
+
     def get_model(self):
         """
         Get current model instance.
@@ -140,11 +176,18 @@ class ModelManager:
             raise RuntimeError("Model not loaded")
         return self.model.tokenizer
 
-    def clear_model_state(self):
+    def clear_model_state(self, release: bool = False):
         """
         Clear any cached state or context from the model.
         
         This ensures the model doesn't maintain context between requests.
+        By default GPU allocations are kept in PyTorch's caching allocator so
+        the next request can reuse them; cached blocks are only returned to
+        the driver when release=True or every cuda_cache_release_interval calls
+        (the /generate batcher calls this once per batch, not per request).
+
+        Args:
+            release: Also release cached CUDA memory (torch.cuda.empty_cache)
         """
         if self.model is None:
             return
@@ -163,11 +206,18 @@ class ModelManager:
             if hasattr(self.model.model, 'cache'):
                 self.model.model.cache = None
             
-            # Clear CUDA cache if using GPU
-            if self.device == "cuda" and torch.cuda.is_available():
+            # Periodically release cached CUDA memory
+            self._clears_since_release += 1
+            interval = self.settings.cuda_cache_release_interval
+            if interval > 0 and self._clears_since_release >= interval:
+                release = True
+
+            # Release CUDA cache if requested and using GPU
+            if release and self.device == "cuda" and torch.cuda.is_available():
                 torch.cuda.empty_cache()
+                self._clears_since_release = 0
+                logger.debug("Released cached CUDA memory")
             
             logger.debug("Model state cleared")
         except Exception as e:
             logger.warning(f"Error clearing model state: {e}")
-
@@ -3,6 +3,7 @@
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 from typing import Dict, List, Optional
 from uuid import uuid4
 
@@ -20,31 +21,48 @@ class CheckedModel:
     status: str = "pending"  # pending, analyzing, completed, failed
     analysis_result: Optional[Dict] = None
     error_message: Optional[str] = None
+    # Serialized forms, reused across API responses until the model changes
+    _checked_at_iso: str = field(init=False, repr=False, compare=False)
+    _cached_dict: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._checked_at_iso = self.checked_at.isoformat()
 
     def to_dict(self) -> Dict:
-        """Convert to dictionary for API responses"""
-        return {
-            "id": self.id,
-            "model_url": self.model_url,
-            "model_id": self.model_id,
-            "checked_at": self.checked_at.isoformat(),
-            "status": self.status,
-            "analysis_result": self.analysis_result,
-            "error_message": self.error_message,
-        }
+        """
+        Convert to dictionary for API responses.
+
+        The dict is cached and shared between calls, so callers must not
+        mutate it. ModelStore.update_model invalidates the cache.
+        """
+        if self._cached_dict is None:
+            self._cached_dict = {
+                "id": self.id,
+                "model_url": self.model_url,
+                "model_id": self.model_id,
+                "checked_at": self._checked_at_iso,
+                "status": self.status,
+                "analysis_result": self.analysis_result,
+                "error_message": self.error_message,
+            }
+        return self._cached_dict
 
 
 class ModelStore:
     """In-memory store for tracking all checked models"""
 
     def __init__(self):
+        # Insertion-ordered, so iteration order is also checked_at order
         self._models: Dict[str, CheckedModel] = {}
+        # URL -> ID of the first model added for that URL
+        self._by_url: Dict[str, str] = {}
         logger.info("ModelStore initialized")
 
     def add_model(self, model_url: str, model_id: Optional[str] = None) -> CheckedModel:
         """Add a new model to the store"""
         model = CheckedModel(model_url=model_url, model_id=model_id)
         self._models[model.id] = model
+        self._by_url.setdefault(model_url, model.id)
         logger.info(f"Added model to store: {model.id} ({model_url})")
         return model
 
@@ -70,25 +88,27 @@ class ModelStore:
             model.analysis_result = analysis_result
         if error_message is not None:
             model.error_message = error_message
+        model._cached_dict = None
 
         logger.info(f"Updated model {model_id}: status={status}")
         return model
 
     def list_models(self, limit: Optional[int] = None) -> List[CheckedModel]:
         """List all checked models, optionally limited"""
-        models = list(self._models.values())
-        # Sort by checked_at descending (most recent first)
-        models.sort(key=lambda m: m.checked_at, reverse=True)
+        # Most recent first: models are added with checked_at = now, so reverse
+        # insertion order is checked_at descending without sorting
+        models = reversed(self._models.values())
+        if limit and limit > 0:
+            return list(islice(models, limit))
         if limit:
-            return models[:limit]
-        return models
+            # Negative limits keep slice semantics (all but the oldest -limit)
+            return list(models)[:limit]
+        return list(models)
 
     def get_model_by_url(self, model_url: str) -> Optional[CheckedModel]:
         """Get a model by URL (useful for checking if already analyzed)"""
-        for model in self._models.values():
-            if model.model_url == model_url:
-                return model
-        return None
+        model_id = self._by_url.get(model_url)
+        return self._models.get(model_id) if model_id else None
 
     def count(self) -> int:
         """Get total number of checked models"""
@@ -1,22 +1,234 @@
 """SAE Converter: Convert SAEs from LlamaScope format to Language-Model-SAEs format"""
 
+import importlib.util
+import json
 import logging
+import multiprocessing
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional
+from typing import Optional, Sequence, Set, Tuple
 
+# Use the Rust-backed parallel downloader when it is installed. huggingface_hub
+# reads this at import time, and fails downloads if it is set without the package.
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+import numpy as np
+import torch
 from huggingface_hub import snapshot_download
-from safetensors.torch import load_file, save_file
+from safetensors import safe_open
+from safetensors.torch import save_file
 
 from app.config import Settings
 
 logger = logging.getLogger(__name__)
 
+# Parallel connections and per-file metadata timeout for SAE snapshot downloads
+_DOWNLOAD_MAX_WORKERS = 8
+_DOWNLOAD_ETAG_TIMEOUT = 30
+
+# Marker files recording which layers are already downloaded / converted, so
+# startup checks are a single file read instead of per-layer stats
+_DOWNLOAD_MARKER = ".download_complete"
+_CONVERSION_MARKER = ".conversion_complete"
+
+# Layout of the converted weights, chosen to match how lm_saes'
+# SparseAutoEncoder consumes them (hidden_pre = x @ W_E, reconstruction =
+# feature_acts @ W_D), so no transpose is needed at load or encode time.
+# LlamaScope stores nn.Linear weights ([out, in]), hence one transpose each
+# at conversion. Recorded in the safetensors header for inspection.
+_LAYOUT_METADATA = {
+    "format": "pt",
+    "w_e_layout": "hidden_first",  # [d_model, d_sae]
+    "w_d_layout": "features_first",  # [d_sae, d_model]
+}
+
+# Default number of conversion worker processes (bounded by memory, not cores)
+_DEFAULT_CONVERSION_WORKERS = 2
+
+# Tile edge for the blocked transpose (64x64 tiles of 2-byte values fit in L1)
+_TRANSPOSE_TILE = 64
+
+# Same-width integer dtypes used to hand arbitrary tensors (e.g. bfloat16) to NumPy
+_BITCAST_DTYPES = {1: torch.uint8, 2: torch.int16, 4: torch.int32, 8: torch.int64}
+
+
+def _transpose_contiguous(tensor: torch.Tensor, tile: int = _TRANSPOSE_TILE) -> torch.Tensor:
+    """
+    Return a contiguous transpose of a 2D CPU tensor.
+
+    Copies tile by tile so both the reads and the writes stay within a few
+    cache lines, instead of the strided element-by-element gather done by
+    tensor.T.contiguous(). The data is bit-cast to a same-width integer type,
+    so dtypes NumPy lacks (bfloat16) are transposed unchanged.
+
+    Args:
+        tensor: 2D tensor on CPU
+        tile: Tile edge length
+
+    Returns:
+        Tensor of shape [cols, rows] with contiguous storage
+    """
+    transposed = tensor.T
+    if transposed.is_contiguous():
+        return transposed
+
+    src = tensor.contiguous().view(_BITCAST_DTYPES[tensor.element_size()]).numpy()
+    rows, cols = src.shape
+    out = np.empty((cols, rows), dtype=src.dtype)
+    for i0 in range(0, rows, tile):
+        for j0 in range(0, cols, tile):
+            out[j0 : j0 + tile, i0 : i0 + tile] = src[i0 : i0 + tile, j0 : j0 + tile].T
+
+    # from_numpy shares the buffer, so no further copy is made
+    return torch.from_numpy(out).view(tensor.dtype)
+
+
+def _read_marker(marker: Path) -> Set[int]:
+    """
+    Read the set of completed layers from a marker file.
+
+    Args:
+        marker: Path to the marker file
+
+    Returns:
+        Layer indices recorded in the marker (empty if missing or unreadable)
+    """
+    try:
+        return set(json.loads(marker.read_text())["layers"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return set()
+
+
+def _write_marker(marker: Path, layers: Sequence[int], **extra) -> None:
+    """
+    Record completed layers in a marker file, merged with those already recorded.
+
+    Args:
+        marker: Path to the marker file
+        layers: Newly completed layer indices
+        **extra: Additional metadata to store (e.g. source repo)
+    """
+    recorded = _read_marker(marker) | set(layers)
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.write_text(json.dumps({"layers": sorted(recorded), **extra}))
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """
+    Hardlink src to dst, falling back to a copy (e.g. across filesystems).
+
+    Args:
+        src: Existing file
+        dst: Destination path, replaced if it exists
+    """
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
+
+
+def _backfill_marker(marker: Path, layers: Sequence[int]) -> None:
+    """
+    Record layers found on disk without a marker. Best effort: the marker is
+    only an optimization, and the tree may be read-only (e.g. baked into an image).
+
+    Args:
+        marker: Path to the marker file
+        layers: Layer indices found to be complete
+    """
+    try:
+        _write_marker(marker, layers)
+    except OSError as e:
+        logger.debug(f"Could not write marker {marker}: {e}")
+
+
+def _rename_key(k: str, v: torch.Tensor) -> Tuple[str, torch.Tensor]:
+    """
+    Rename a single state dict entry according to conversion rules.
+
+    Args:
+        k: Original key
+        v: Original tensor
+
+    Returns:
+        Tuple of (new key, converted tensor)
+    """
+    key_map = {
+        "decoder.bias": "b_D",
+        "encoder.bias": "b_E",
+    }
+
+    if k == "encoder.weight":
+        # [d_sae, d_model] -> [d_model, d_sae], stored contiguous (see _LAYOUT_METADATA)
+        return "W_E", _transpose_contiguous(v)
+    elif k == "decoder.weight":
+        # [d_model, d_sae] -> [d_sae, d_model], stored contiguous (see _LAYOUT_METADATA)
+        return "W_D", _transpose_contiguous(v)
+    else:
+        return key_map.get(k, k), v
+
+
+def _convert_single_sae(layer: int, source_dir: Path, target_dir: Path):
+    """
+    Convert a single layer's SAE.
+
+    Module-level (rather than a method) so it can be pickled and run in a
+    worker process.
+
+    Args:
+        layer: Layer index
+        source_dir: Source directory containing original SAEs
+        target_dir: Target directory for converted SAEs
+
+    Raises:
+        FileNotFoundError: If source files don't exist
+        Exception: If conversion fails
+    """
+    src_sae_dir = source_dir / f"Llama3_1-8B-Base-L{layer}R-8x"
+    dst_sae_dir = target_dir / f"Llama3_1-8B-Base-L{layer}R-8x"
+
+    # Check source files exist
+    src_safetensors = src_sae_dir / "checkpoints" / "final.safetensors"
+    src_hyperparams = src_sae_dir / "hyperparams.json"
+    src_lm_config = src_sae_dir / "lm_config.json"
+
+    if not src_safetensors.exists():
+        raise FileNotFoundError(f"Source safetensors not found: {src_safetensors}")
+
+    # Create target directories
+    dst_sae_dir.mkdir(parents=True, exist_ok=True)
+    (dst_sae_dir / "checkpoints").mkdir(parents=True, exist_ok=True)
+
+    # Load and convert safetensors one tensor at a time, so each source
+    # tensor is released as soon as its converted copy exists
+    logger.debug(f"Loading safetensors for layer {layer}")
+    new_state_dict = {}
+    with safe_open(str(src_safetensors), framework="pt") as f:
+        for key in f.keys():
+            new_key, tensor = _rename_key(key, f.get_tensor(key))
+            new_state_dict[new_key] = tensor
+
+    # Save converted safetensors
+    dst_safetensors = dst_sae_dir / "checkpoints" / "final.safetensors"
+    logger.debug(f"Saving converted safetensors to {dst_safetensors}")
+    save_file(new_state_dict, str(dst_safetensors), metadata=_LAYOUT_METADATA)
+
+    # Link config files (they are never modified), copying across filesystems
+    if src_hyperparams.exists():
+        _link_or_copy(src_hyperparams, dst_sae_dir / "config.json")
+    if src_lm_config.exists():
+        _link_or_copy(src_lm_config, dst_sae_dir / "lm_config.json")
+
 
 class SAEConverter:
     """Handles one-time conversion of SAEs from LlamaScope format"""
 
+    __slots__ = ("settings", "source_repo", "target_path", "temp_path")
+
     def __init__(self, settings: Settings):
         self.settings = settings
         self.source_repo = settings.sae_source_repo
@@ -24,7 +236,7 @@ class SAEConverter:
         self.temp_path = Path(settings.sae_temp_path) if settings.sae_temp_path else None
 
     def convert_saes(
-        self, layers: Optional[List[int]] = None, force: bool = False
+        self, layers: Optional[Sequence[int]] = None, force: bool = False
     ) -> bool:
         """
         Convert SAEs from LlamaScope format to Language-Model-SAEs format.
@@ -47,30 +259,54 @@ class SAEConverter:
             return True
 
         # Download SAEs if needed
-        source_dir = self._download_saes_if_needed()
+        source_dir = self._download_saes_if_needed(layers)
         if source_dir is None:
             logger.error("Failed to download SAEs")
             return False
 
-        # Convert each layer
+        # Layers are about to be rewritten; the marker is restored on success
+        (self.target_path / _CONVERSION_MARKER).unlink(missing_ok=True)
+
+        # Convert layers in parallel worker processes (the transpose is
+        # CPU-bound, so threads would contend on the GIL). Workers are spawned
+        # rather than forked: conversion may run while another thread is
+        # loading the model onto the GPU. Each worker holds a full SAE and its
+        # transposed copy (several GB), so the default is a small fixed cap;
+        # MODX_SAE_CONVERSION_WORKERS raises it on hosts with enough memory.
+        max_workers = self.settings.sae_conversion_workers or _DEFAULT_CONVERSION_WORKERS
+        max_workers = max(1, min(max_workers, len(layers)))
+        logger.info(f"Converting {len(layers)} layers with {max_workers} worker process(es)")
+
         success_count = 0
-        for layer in layers:
-            try:
-                self.convert_single_sae(layer, source_dir, self.target_path)
-                success_count += 1
-                logger.info(f"Successfully converted SAE for layer {layer}")
-            except Exception as e:
-                logger.error(f"Failed to convert SAE for layer {layer}: {e}")
-                if not force:
-                    # Continue with other layers even if one fails
-                    continue
-                else:
-                    return False
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = {
+                executor.submit(_convert_single_sae, layer, source_dir, self.target_path): layer
+                for layer in layers
+            }
+            for future in as_completed(futures):
+                layer = futures[future]
+                try:
+                    future.result()
+                    success_count += 1
+                    logger.info(f"Successfully converted SAE for layer {layer}")
+                except Exception as e:
+                    logger.error(f"Failed to convert SAE for layer {layer}: {e}")
+                    if not force:
+                        # Continue with other layers even if one fails
+                        continue
+                    else:
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        return False
 
         logger.info(f"SAE conversion complete: {success_count}/{len(layers)} layers converted")
-        return success_count == len(layers)
+        if success_count == len(layers):
+            _write_marker(self.target_path / _CONVERSION_MARKER, layers)
+            return True
+        return False
 
-    def is_conversion_complete(self, layers: List[int]) -> bool:
+    def is_conversion_complete(self, layers: Sequence[int]) -> bool:
         """
         Check if SAE conversion is already complete for all specified layers.
 
@@ -80,6 +316,11 @@ class SAEConverter:
         Returns:
             True if all layers are converted, False otherwise.
         """
+        # Fast path: a single read of the marker written after conversion
+        if set(layers) <= _read_marker(self.target_path / _CONVERSION_MARKER):
+            return True
+
+        # Fall back to checking files (e.g. trees converted before markers existed)
         for layer in layers:
             sae_dir = self.target_path / f"Llama3_1-8B-Base-L{layer}R-8x"
             safetensors_file = sae_dir / "checkpoints" / "final.safetensors"
@@ -89,6 +330,7 @@ class SAEConverter:
                 logger.debug(f"Layer {layer} not yet converted")
                 return False
 
+        _backfill_marker(self.target_path / _CONVERSION_MARKER, layers)
         return True
 
     def convert_single_sae(self, layer: int, source_dir: Path, target_dir: Path):
@@ -104,69 +346,17 @@ class SAEConverter:
             FileNotFoundError: If source files don't exist
             Exception: If conversion fails
         """
-        src_sae_dir = source_dir / f"Llama3_1-8B-Base-L{layer}R-8x"
-        dst_sae_dir = target_dir / f"Llama3_1-8B-Base-L{layer}R-8x"
-
-        # Check source files exist
-        src_safetensors = src_sae_dir / "checkpoints" / "final.safetensors"
-        src_hyperparams = src_sae_dir / "hyperparams.json"
-        src_lm_config = src_sae_dir / "lm_config.json"
-
-        if not src_safetensors.exists():
-            raise FileNotFoundError(f"Source safetensors not found: {src_safetensors}")
-
-        # Create target directories
-        dst_sae_dir.mkdir(parents=True, exist_ok=True)
-        (dst_sae_dir / "checkpoints").mkdir(parents=True, exist_ok=True)
-
-        # Load and convert safetensors
-        logger.debug(f"Loading safetensors for layer {layer}")
-        state_dict = load_file(str(src_safetensors))
-        new_state_dict = self._rename_keys(state_dict)
-
-        # Save converted safetensors
-        dst_safetensors = dst_sae_dir / "checkpoints" / "final.safetensors"
-        logger.debug(f"Saving converted safetensors to {dst_safetensors}")
-        save_file(new_state_dict, str(dst_safetensors))
-
-        # Copy config files
-        if src_hyperparams.exists():
-            shutil.copy(src_hyperparams, dst_sae_dir / "config.json")
-        if src_lm_config.exists():
-            shutil.copy(src_lm_config, dst_sae_dir / "lm_config.json")
-
-    def _rename_keys(self, state_dict: dict) -> dict:
-        """
-        Rename keys in state dict according to conversion rules.
+        _convert_single_sae(layer, source_dir, target_dir)
 
-        Args:
-            state_dict: Original state dict
-
-        Returns:
-            New state dict with renamed keys
-        """
-        key_map = {
-            "decoder.bias": "b_D",
-            "encoder.bias": "b_E",
-        }
-        new_state_dict = {}
-
-        for k, v in state_dict.items():
-            if k == "encoder.weight":
-                # Transpose and make contiguous
-                new_state_dict["W_E"] = v.T.contiguous()
-            elif k == "decoder.weight":
-                # Transpose and make contiguous
-                new_state_dict["W_D"] = v.T.contiguous()
-            else:
-                new_state_dict[key_map.get(k, k)] = v
-
-        return new_state_dict
-
-    def _download_saes_if_needed(self) -> Optional[Path]:
+    def _download_saes_if_needed(self, layers: Sequence[int]) -> Optional[Path]:
         """
         Download SAEs from HuggingFace if not already present.
 
+        Only the directories of the requested layers are fetched.
+
+        Args:
+            layers: Layer indices whose SAEs are needed
+
         Returns:
             Path to source directory, or None if download failed
         """
@@ -180,20 +370,40 @@ class SAEConverter:
             )
 
         source_dir = Path(source_dir)
+        marker = source_dir / _DOWNLOAD_MARKER
+
+        # Check if already downloaded: the marker first, then per layer, since
+        # earlier runs may have fetched a different subset or predate the marker
+        if set(layers) <= _read_marker(marker):
+            logger.info(f"SAEs already downloaded at {source_dir}")
+            return source_dir
 
-        # Check if already downloaded
-        if source_dir.exists() and any(source_dir.iterdir()):
+        missing_layers = [
+            layer
+            for layer in layers
+            if not (
+                source_dir / f"Llama3_1-8B-Base-L{layer}R-8x" / "checkpoints" / "final.safetensors"
+            ).exists()
+        ]
+        if not missing_layers:
+            _backfill_marker(marker, layers)
             logger.info(f"SAEs already downloaded at {source_dir}")
             return source_dir
 
         # Download from HuggingFace
-        logger.info(f"Downloading SAEs from {self.source_repo} to {source_dir}")
+        logger.info(
+            f"Downloading SAEs for layers {missing_layers} from {self.source_repo} to {source_dir}"
+        )
         try:
             snapshot_download(
                 repo_id=self.source_repo,
                 local_dir=str(source_dir),
                 token=self.settings.hf_token,
+                allow_patterns=[f"Llama3_1-8B-Base-L{layer}R-8x/*" for layer in missing_layers],
+                max_workers=_DOWNLOAD_MAX_WORKERS,
+                etag_timeout=_DOWNLOAD_ETAG_TIMEOUT,
             )
+            _write_marker(marker, layers, repo_id=self.source_repo)
             logger.info(f"Successfully downloaded SAEs to {source_dir}")
             return source_dir
         except Exception as e:
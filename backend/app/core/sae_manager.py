@@ -15,24 +15,24 @@ logger = logging.getLogger(__name__)
 class SAEManager:
     """Manages SAE loading and attachment to model layers"""
 
+    __slots__ = ("settings", "sae_base_path", "saes", "_sae_devices", "device")
+
     def __init__(self, settings: Settings):
         self.settings = settings
         self.sae_base_path = Path(settings.sae_base_path)
         self.saes: Dict[int, object] = {}  # Will be SparseAutoEncoder when loaded
+        self._sae_devices: Dict[int, torch.device] = {}  # Parameter device per loaded SAE
         self.device = settings.device
-        self._imports = None  # Lazy-loaded imports
 
     def _ensure_imports(self):
-        """Lazy load Language-Model-SAEs imports"""
-        if self._imports is None:
-            imports = import_lm_saes()
-            if imports is None:
-                raise ImportError(
-                    "Failed to import Language-Model-SAEs. "
-                    "Please run: python setup_dependencies.py"
-                )
-            self._imports = imports
-        return self._imports
+        """Lazy load Language-Model-SAEs imports (cached by import_lm_saes)"""
+        imports = import_lm_saes()
+        if imports is None:
+            raise ImportError(
+                "Failed to import Language-Model-SAEs. "
+                "Please run: python setup_dependencies.py"
+            )
+        return imports
 
     def load_sae(self, layer: int):
         """
@@ -76,9 +76,10 @@ class SAEManager:
 
             # Move to device if needed
             if self.device == "cuda" and torch.cuda.is_available():
-                sae = sae.cuda()
+                sae = self._move_to_cuda(sae)
 
             self.saes[layer] = sae
+            self._sae_devices[layer] = next(sae.parameters()).device
             logger.info(f"Successfully loaded SAE for layer {layer}")
 
             return sae
@@ -87,6 +88,25 @@ class SAEManager:
             logger.error(f"Failed to load SAE for layer {layer}: {e}")
             raise
 
+    @staticmethod
+    def _move_to_cuda(sae):
+        """
+        Upload SAE weights to the GPU through pinned host memory.
+
+        Parameters are copied into page-locked buffers first, so the
+        host-to-device transfers run as async DMA on a side stream instead of
+        synchronous copies from pageable memory. The current stream waits on
+        the side stream, so later kernels see the uploaded weights.
+        """
+        for param in sae.parameters():
+            param.data = param.data.pin_memory()
+
+        stream = torch.cuda.Stream()
+        with torch.cuda.stream(stream):
+            sae = sae.to("cuda", non_blocking=True)
+        torch.cuda.current_stream().wait_stream(stream)
+        return sae
+
     def get_sae(self, layer: int) -> Optional[object]:
         """
         Get SAE for a layer (loads if not already loaded).
@@ -111,7 +131,9 @@ class SAEManager:
 
         Args:
             layer: Layer index
-            activations: Activation tensor of shape [batch, seq_len, hidden_dim] or [seq_len, hidden_dim]
+            activations: Activation tensor of shape [batch, seq_len, hidden_dim] or [seq_len, hidden_dim].
+                Callers pass contiguous bfloat16 tensors (as InferencePipeline does)
+                so the encoder matmul reads half the bytes and hits the dense GEMM path
 
         Returns:
             Feature activations tensor of shape [batch, seq_len, num_features] or [seq_len, num_features]
@@ -121,11 +143,14 @@ class SAEManager:
             raise RuntimeError(f"SAE not available for layer {layer}")
 
         # Ensure activations are on correct device
-        if activations.device != next(sae.parameters()).device:
-            activations = activations.to(next(sae.parameters()).device)
+        sae_device = self._sae_devices[layer]
+        if activations.device != sae_device:
+            # Async only for uploads; a non_blocking copy back to the CPU
+            # could be read before it lands
+            activations = activations.to(sae_device, non_blocking=sae_device.type == "cuda")
 
         # Encode through SAE
-        with torch.no_grad():
+        with torch.inference_mode():
             features = sae.encode(activations)
 
         return features
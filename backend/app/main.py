@@ -1,16 +1,22 @@
 """FastAPI application entry point"""
 
+import asyncio
 import logging
 import sys
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
-from app.api.routes import router, set_instances
+from app.api.routes import router, set_instances, shutdown_instances
 from app.config import get_settings
 from app.core.feature_detector import FeatureDetector
+from app.core.inference import InferencePipeline
+from app.core.model_manager import ModelManager
 from app.core.model_store import ModelStore
+from app.core.sae_converter import SAEConverter
+from app.core.sae_manager import SAEManager
 
 # Configure logging
 logging.basicConfig(
@@ -22,28 +28,54 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Manage application lifespan: startup and shutdown"""
-    settings = get_settings()
-
-    # Startup
-    logger.info("Starting Modx service...")
-
-    # Step 1: Initialize feature detector (doesn't require LM-SAEs)
-    logger.info("Step 1: Initializing feature detector...")
+def _init_feature_detector(settings) -> FeatureDetector:
+    """Load quarantined features and warm up the detector (blocking)"""
+    logger.info("Initializing feature detector...")
     try:
         feature_detector = FeatureDetector(
             quarantined_features_path=settings.quarantined_features_path,
             activation_threshold=settings.activation_threshold,
         )
+        if settings.device == "cpu":
+            feature_detector.warmup()
         logger.info("Feature detector initialized successfully")
+        return feature_detector
     except Exception as e:
         logger.error(f"Failed to initialize feature detector: {e}", exc_info=True)
         raise
 
-    # Step 2: Initialize model store
-    logger.info("Step 2: Initializing model store...")
+
+def _convert_saes(settings) -> None:
+    """Run the one-time SAE conversion (blocking)"""
+    converter = SAEConverter(settings)
+    if not converter.convert_saes(force=settings.force_sae_conversion):
+        logger.warning("SAE conversion had some failures, but continuing...")
+
+
+def _load_model(settings) -> ModelManager:
+    """Create a ModelManager and load the default model (blocking)"""
+    model_manager = ModelManager(settings)
+    model_manager.load_model()
+    return model_manager
+
+
+def _load_sae(settings) -> SAEManager:
+    """Create an SAEManager and load the SAE for the default layer (blocking)"""
+    sae_manager = SAEManager(settings)
+    sae_manager.load_sae(settings.layer)
+    return sae_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage application lifespan: startup and shutdown"""
+    settings = get_settings()
+
+    # Startup
+    logger.info("Starting Modx service...")
+
+    # Step 1: Initialize model store
+    logger.info("Step 1: Initializing model store...")
     try:
         model_store = ModelStore()
         logger.info("Model store initialized successfully")
@@ -51,21 +83,57 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize model store: {e}", exc_info=True)
         raise
 
-    # Initialize managers as None - they will be created on-demand when analyzing models
-    model_manager = None
-    sae_manager = None
-    inference_pipeline = None
-
-    # Set global instances for routes
-    set_instances(model_manager, sae_manager, feature_detector, inference_pipeline, model_store)
-
-    logger.info("Modx service started successfully! Models and SAEs will be loaded on-demand.")
+    if settings.enable_on_demand_loading:
+        # Step 2: Initialize feature detector (doesn't require LM-SAEs)
+        logger.info("Step 2: Initializing feature detector...")
+        feature_detector = await asyncio.to_thread(_init_feature_detector, settings)
+
+        # Initialize managers as None - they will be created on-demand when analyzing models
+        model_manager = None
+        sae_manager = None
+        inference_pipeline = None
+    else:
+        # Step 2: Initialize feature detector, convert SAEs and load the model.
+        # These are independent, so they run concurrently in worker threads.
+        logger.info(
+            "Step 2: Initializing feature detector, converting SAEs and loading model "
+            "(on-demand loading disabled)..."
+        )
+        try:
+            feature_detector, _, model_manager = await asyncio.gather(
+                asyncio.to_thread(_init_feature_detector, settings),
+                asyncio.to_thread(_convert_saes, settings),
+                asyncio.to_thread(_load_model, settings),
+            )
+
+            # Step 3: Load SAE (needs converted SAEs) and build the pipeline
+            logger.info("Step 3: Loading SAE...")
+            sae_manager = await asyncio.to_thread(_load_sae, settings)
+
+            inference_pipeline = InferencePipeline(
+                model_manager=model_manager,
+                sae_manager=sae_manager,
+                feature_detector=feature_detector,
+                settings=settings,
+            )
+            logger.info("Model and SAEs loaded successfully")
+        except Exception as e:
+            logger.error(f"Failed to load model and SAEs: {e}", exc_info=True)
+            raise
+
+    # Attach instances to app.state for routes
+    set_instances(app, model_manager, sae_manager, feature_detector, inference_pipeline, model_store)
+
+    if settings.enable_on_demand_loading:
+        logger.info("Modx service started successfully! Models and SAEs will be loaded on-demand.")
+    else:
+        logger.info("Modx service started successfully!")
 
     yield
 
     # Shutdown
     logger.info("Shutting down Modx service...")
-    # Cleanup if needed
+    await shutdown_instances(app)
     logger.info("Shutdown complete")
 
 
@@ -75,6 +143,7 @@ app = FastAPI(
     description="LLM inference with quarantined feature detection",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FeatureActivation:
     """Represents an activated quarantined feature"""
 
@@ -15,7 +15,7 @@ class FeatureActivation:
     token_position: Optional[int] = None  # Which token position this activation occurred at
 
 
-@dataclass
+@dataclass(slots=True)
 class FeatureDetectionResult:
     """Result of feature detection on a sequence"""
 
@@ -11,37 +11,80 @@ logger = logging.getLogger(__name__)
 class ActivationHook:
     """Hook to capture activations from a specific layer"""
 
+    __slots__ = (
+        "layer_name",
+        "activations",
+        "hook_handle",
+        "_root",
+        "_target_module",
+        "_capture",
+    )
+
     def __init__(self, layer_name: str):
         self.layer_name = layer_name
         self.activations: Optional[torch.Tensor] = None
         self.hook_handle: Optional[torch.utils.hooks.RemovableHandle] = None
+        # Resolved target module and the model it was resolved from
+        self._root: Optional[torch.nn.Module] = None
+        self._target_module: Optional[torch.nn.Module] = None
+        # Output handler, specialized to the output type on the first call
+        self._capture = self._capture_first
 
     def __call__(self, module, input, output):
         """Hook function that captures the output"""
+        self._capture(output)
+
+    def _capture_first(self, output):
+        """Pick the capture path for this layer's output type, then capture"""
         # output is typically a tensor or tuple
         if isinstance(output, torch.Tensor):
-            self.activations = output.detach()
+            self._capture = self._capture_tensor
         elif isinstance(output, tuple) and len(output) > 0:
-            self.activations = output[0].detach()
+            self._capture = self._capture_tuple
         else:
             logger.warning(f"Unexpected output type from {self.layer_name}: {type(output)}")
             self.activations = None
+            return
+        self._capture(output)
+
+    # Under no_grad/inference_mode outputs never require grad, so .data (no
+    # autograd bookkeeping) is enough; detach() is only needed otherwise
+    def _capture_tensor(self, output: torch.Tensor):
+        self.activations = output.detach() if output.requires_grad else output.data
+
+    def _capture_tuple(self, output: tuple):
+        output = output[0]
+        self.activations = output.detach() if output.requires_grad else output.data
+
+    def _resolve(self, model) -> Optional[torch.nn.Module]:
+        """Find the module named by layer_name, reusing the last lookup for the same model"""
+        if self._target_module is not None and self._root is model:
+            return self._target_module
+
+        # Navigate to the layer
+        module = model
+        for part in self.layer_name.split("."):
+            if hasattr(module, part):
+                module = getattr(module, part)
+            else:
+                logger.error(f"Could not find layer '{part}' in path '{self.layer_name}'")
+                return None
+
+        self._root = model
+        self._target_module = module
+        return module
 
     def attach(self, model) -> bool:
         """Attach hook to model at specified layer"""
         try:
-            # Navigate to the layer
-            parts = self.layer_name.split(".")
-            module = model
-            for part in parts:
-                if hasattr(module, part):
-                    module = getattr(module, part)
-                else:
-                    logger.error(f"Could not find layer '{part}' in path '{self.layer_name}'")
-                    return False
+            module = self._resolve(model)
+            if module is None:
+                return False
 
             # Register forward hook
-            self.hook_handle = module.register_forward_hook(self)
+            self.hook_handle = module.register_forward_hook(
+                self, prepend=False, with_kwargs=False
+            )
             logger.info(f"Attached activation hook to {self.layer_name}")
             return True
 
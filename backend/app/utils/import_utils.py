@@ -2,6 +2,7 @@
 
 import logging
 import sys
+from importlib.util import find_spec
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -10,35 +11,34 @@ logger = logging.getLogger(__name__)
 LM_SAES_DIR = Path(__file__).parent.parent.parent / "Language-Model-SAEs"
 LM_SAES_SRC = LM_SAES_DIR / "src"
 
+# Result of the first successful import_lm_saes() call, shared process-wide
+_lm_saes_imports = None
+
 
 def ensure_lm_saes_in_path():
     """
     Ensure Language-Model-SAEs is in Python path.
     
     This checks if the package is already importable, and if not,
-    tries to add it to sys.path from the local repository.
+    tries to add it to sys.path from the local repository. Availability is
+    checked with find_spec, so lm_saes itself is not imported here.
     """
-    try:
-        import lm_saes
+    if find_spec("lm_saes") is not None:
         # Already available
         return True
-    except ImportError:
-        pass
 
     # Try to add from local repository
     if LM_SAES_SRC.exists() and str(LM_SAES_SRC) not in sys.path:
         logger.info(f"Adding {LM_SAES_SRC} to Python path")
         sys.path.insert(0, str(LM_SAES_SRC))
-        try:
-            import lm_saes
-            logger.info("Successfully imported Language-Model-SAEs from local repository")
+        if find_spec("lm_saes") is not None:
+            logger.info("Found Language-Model-SAEs in local repository")
             return True
-        except ImportError:
-            logger.warning(
-                f"Language-Model-SAEs not found at {LM_SAES_SRC}. "
-                "Please run: python setup_dependencies.py"
-            )
-            return False
+        logger.warning(
+            f"Language-Model-SAEs not found at {LM_SAES_SRC}. "
+            "Please run: python setup_dependencies.py"
+        )
+        return False
 
     return False
 
@@ -46,11 +46,19 @@ def ensure_lm_saes_in_path():
 def import_lm_saes():
     """
     Import Language-Model-SAEs modules with proper error handling.
+
+    The imports are resolved once per process; later calls return the cached
+    tuple. Failures are not cached, so a call after running
+    setup_dependencies.py can still succeed.
     
     Returns:
         Tuple of (LanguageModel, SAEConfig, LanguageModelConfig, SparseAutoEncoder, to_tokens, load_model)
         or None if import fails
     """
+    global _lm_saes_imports
+    if _lm_saes_imports is not None:
+        return _lm_saes_imports
+
     if not ensure_lm_saes_in_path():
         return None
 
@@ -61,7 +69,7 @@ def import_lm_saes():
         from lm_saes.resource_loaders import load_model
         from lm_saes.sae import SparseAutoEncoder
 
-        return (
+        _lm_saes_imports = (
             LanguageModel,
             SAEConfig,
             LanguageModelConfig,
@@ -69,6 +77,7 @@ def import_lm_saes():
             to_tokens,
             load_model,
         )
+        return _lm_saes_imports
     except ImportError as e:
         logger.error(f"Failed to import Language-Model-SAEs modules: {e}")
         logger.error(
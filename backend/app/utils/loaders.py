@@ -1,12 +1,28 @@
 """File loading utilities"""
 
-import json
 import logging
+import mmap
+import os
 from pathlib import Path
 from typing import Dict, Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Files at least this large are parsed straight from a read-only memory map
+_MMAP_THRESHOLD_BYTES = 10 * 1024 * 1024
+
+
+def _read_json(file_path: Path):
+    """Parse a JSON file with orjson, memory-mapping large files instead of reading them"""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _MMAP_THRESHOLD_BYTES:
+            return orjson.loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
 
 def load_quarantined_features(path: str) -> Dict[int, str]:
     """
@@ -20,8 +36,7 @@ def load_quarantined_features(path: str) -> Dict[int, str]:
 
     Raises:
         FileNotFoundError: If file doesn't exist
-        json.JSONDecodeError: If file is invalid JSON
-        ValueError: If file format is incorrect
+        ValueError: If file is invalid JSON or its format is incorrect
     """
     file_path = Path(path)
 
@@ -29,23 +44,22 @@ def load_quarantined_features(path: str) -> Dict[int, str]:
         raise FileNotFoundError(f"Quarantined features file not found: {path}")
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _read_json(file_path)
 
         # Convert string keys to integers
         # Format: {"884": "description", "19397": "description"}
-        quarantined = {}
-        for key, value in data.items():
-            try:
-                feature_index = int(key)
-                quarantined[feature_index] = value
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Invalid feature index '{key}': {e}")
-                continue
+        # Only plain ASCII digit strings are valid (this also rejects negatives)
+        quarantined = {
+            int(key): value for key, value in data.items() if key.isascii() and key.isdigit()
+        }
+        if len(quarantined) != len(data):
+            invalid = [key for key in data if not (key.isascii() and key.isdigit())]
+            if invalid:
+                logger.warning(f"Skipping invalid feature indices: {invalid}")
 
         logger.info(f"Loaded {len(quarantined)} quarantined features from {path}")
         return quarantined
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in quarantined features file: {e}") from e
 
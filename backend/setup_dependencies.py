@@ -5,88 +5,469 @@ import logging
 import os
 import subprocess
 import sys
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional, Sequence
 
-logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
 # Repository details
 LM_SAES_REPO = "https://github.com/OpenMOSS/Language-Model-SAEs.git"
 LM_SAES_DIR = Path(__file__).parent / "Language-Model-SAEs"
 LM_SAES_SRC = LM_SAES_DIR / "src"
+LM_SAES_SRC_PTH_ENTRY = str(LM_SAES_SRC.resolve())  # Line written to the .pth file
 
+# Top-level files that make the checkout pip-installable
+PACKAGING_FILES = {"pyproject.toml", "setup.py"}
 
-def clone_repo(force: bool = False) -> bool:
+# Distribution name of the installed package
+LM_SAES_DIST = "lm_saes"
+
+# lm_saes submodules imported by the backend (see app/utils/import_utils.py)
+LM_SAES_SUBMODULES = ["backend", "config", "resource_loaders", "sae"]
+
+# Branch or tag to install (default: the remote's default branch)
+LM_SAES_REF = os.environ.get("MODX_LM_SAES_REF")
+
+# Optional shared bare mirror that clones borrow objects from (--reference-dir)
+LM_SAES_MIRROR = os.environ.get("MODX_LM_SAES_MIRROR")
+
+# Records what the last successful pip install was built from, so unchanged
+# re-runs skip pip entirely (removed with the checkout on --force)
+INSTALL_STAMP = LM_SAES_DIR / ".install_stamp"
+
+
+# Local wheel directory pip checks before PyPI (--find-links). Fill it with
+# --fill-wheel-cache; --offline then installs from it without PyPI.
+WHEEL_CACHE = Path(
+    os.environ.get("MODX_WHEEL_CACHE", Path.home() / ".cache" / "modx" / "wheels")
+)
+
+# Lines of subprocess output kept for error reports (the rest is only logged)
+OUTPUT_TAIL_LINES = 200
+
+# git clone --filter values for partial clones. Missing objects are fetched
+# lazily by later git commands; pip install -e only reads the working tree.
+PARTIAL_CLONE_FILTERS = {
+    "blob": "--filter=blob:none",
+    "tree": "--filter=tree:0",
+    "none": None,
+}
+
+# Directories materialized by a sparse checkout (top-level files always are)
+SPARSE_CHECKOUT_DIRS = ["src"]
+
+
+def _run(args: Sequence[str]) -> None:
+    """
+    Run a command, streaming its combined output to the debug log.
+
+    Only the last OUTPUT_TAIL_LINES lines are kept, so memory stays bounded
+    however much the command prints.
+
+    Raises:
+        CalledProcessError: If the command fails; its output holds the kept lines
+    """
+    tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    with subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+    ) as proc:
+        for line in proc.stdout:
+            line = line.rstrip()
+            logger.debug(line)
+            tail.append(line)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args, output="\n".join(tail))
+
+
+@lru_cache(maxsize=1)
+def _git_executable() -> str:
+    """
+    Absolute path of git, searched for on PATH once per run.
+
+    Falls back to plain "git" so a missing git still fails at the call site
+    with FileNotFoundError, which callers report.
+    """
+    import shutil
+    return shutil.which("git") or "git"
+
+
+def _git(*args: str) -> None:
+    """Run a git command, raising CalledProcessError on failure"""
+    _run([_git_executable(), *args])
+
+
+def _git_batch(*commands: Sequence[str]) -> None:
+    """
+    Run several git commands in order, stopping at the first failure.
+
+    On POSIX they are chained with && in a single /bin/sh process instead of
+    spawning one process per command from Python.
+
+    Args:
+        *commands: Argument lists for git (without the leading "git")
+
+    Raises:
+        CalledProcessError: If any command fails
+    """
+    if os.name != "posix":
+        for args in commands:
+            _git(*args)
+        return
+
+    import shlex
+    _run(["/bin/sh", "-c", " && ".join(shlex.join([_git_executable(), *args]) for args in commands)])
+
+
+@lru_cache(maxsize=1)
+def _lm_dir_exists() -> bool:
+    """Whether LM_SAES_DIR exists, checked once until clone_repo changes it"""
+    return LM_SAES_DIR.exists()
+
+
+@lru_cache(maxsize=1)
+def _site_packages() -> Optional[str]:
+    """Site-packages directory for the .pth file (user site as a fallback)"""
+    import site
+    site_packages = site.getsitepackages()
+    return site_packages[0] if site_packages else site.getusersitepackages()
+
+
+def clone_repo(
+    force: bool = False,
+    depth: int = 1,
+    partial_clone: str = "blob",
+    sparse: bool = True,
+    update: bool = False,
+    reference_dir: Optional[Path] = None,
+    ref: Optional[str] = None,
+) -> bool:
     """
     Clone the Language-Model-SAEs repository.
 
+    Only the checked-out tree is needed to install the package, so by default
+    just the latest commit of the branch is fetched, as a partial
+    clone that downloads file contents only when they are checked out, and
+    only src/ plus the top-level packaging files are checked out.
+
     Args:
         force: If True, remove existing directory and re-clone
+        depth: Number of commits of history to fetch (0 for full history)
+        partial_clone: Partial clone filter, a key of PARTIAL_CLONE_FILTERS
+        sparse: Check out only SPARSE_CHECKOUT_DIRS and top-level files
+        update: If the repository already exists, fetch the latest commit and
+            reset to it (only new objects are transferred)
+        reference_dir: Bare mirror to copy objects from instead of the network;
+            created (as a blobless mirror) on first use
+        ref: Branch or tag to check out (default: the remote's default branch)
 
     Returns:
         True if successful, False otherwise
     """
-    if LM_SAES_DIR.exists():
+    if _lm_dir_exists():
         if force:
             logger.info(f"Removing existing directory: {LM_SAES_DIR}")
             import shutil
             shutil.rmtree(LM_SAES_DIR)
+        elif update:
+            return _update_repo(depth, partial_clone, ref)
         else:
             logger.info(f"Repository already exists at {LM_SAES_DIR}")
             return True
 
+    # The directory is (re)created below; later callers must check again
+    _lm_dir_exists.cache_clear()
+
     logger.info(f"Cloning {LM_SAES_REPO} to {LM_SAES_DIR}...")
     try:
-        subprocess.run(
-            ["git", "clone", LM_SAES_REPO, str(LM_SAES_DIR)],
-            check=True,
-            capture_output=True,
-            text=True,
-        )
+        branch_options = ["--branch", ref] if ref else []
+        clone_options = list(branch_options)
+        if depth > 0:
+            clone_options += [f"--depth={depth}", "--single-branch"]
+        if PARTIAL_CLONE_FILTERS[partial_clone]:
+            clone_options.append(PARTIAL_CLONE_FILTERS[partial_clone])
+        if sparse:
+            clone_options.append("--no-checkout")
+
+        commands = []
+        if reference_dir is not None:
+            if not (reference_dir / "HEAD").exists():
+                logger.info(f"Creating mirror of {LM_SAES_REPO} at {reference_dir}")
+                commands.append(
+                    ["clone", "--bare", "--filter=blob:none", LM_SAES_REPO, str(reference_dir)]
+                )
+            # --dissociate copies the borrowed objects, so the clone stays
+            # valid if the mirror is moved or pruned
+            clone_options += ["--reference-if-able", str(reference_dir), "--dissociate"]
+
+        if len(clone_options) > len(branch_options):
+            try:
+                commands.append(["clone", *clone_options, LM_SAES_REPO, str(LM_SAES_DIR)])
+                if sparse:
+                    # Cone mode always includes top-level files (pyproject.toml,
+                    # setup.py, setup.cfg, README*), so only directories are listed
+                    commands += [
+                        ["-C", str(LM_SAES_DIR), "sparse-checkout", "init", "--cone"],
+                        ["-C", str(LM_SAES_DIR), "sparse-checkout", "set", *SPARSE_CHECKOUT_DIRS],
+                        ["-C", str(LM_SAES_DIR), "checkout"],
+                    ]
+                _git_batch(*commands)
+                logger.info("Repository cloned successfully")
+                return True
+            except subprocess.CalledProcessError as e:
+                # Some servers/old git versions reject shallow, partial or
+                # sparse clones
+                logger.warning(f"Reduced clone failed, retrying with a full clone:\n{e.output}")
+                if LM_SAES_DIR.exists():
+                    import shutil
+                    shutil.rmtree(LM_SAES_DIR)
+
+        _git("clone", *branch_options, LM_SAES_REPO, str(LM_SAES_DIR))
         logger.info("Repository cloned successfully")
         return True
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to clone repository: {e}")
-        logger.error(f"stdout: {e.stdout}")
-        logger.error(f"stderr: {e.stderr}")
+        logger.error(f"Output (last lines):\n{e.output}")
         return False
     except FileNotFoundError:
         logger.error("git command not found. Please install git.")
         return False
 
 
-def install_package() -> bool:
+def _update_repo(depth: int, partial_clone: str, ref: Optional[str] = None) -> bool:
     """
-    Install the Language-Model-SAEs package in editable mode.
+    Bring an existing clone up to date with a remote branch or tag.
+
+    Args:
+        depth: Number of commits of history to fetch (0 for full history)
+        partial_clone: Partial clone filter, a key of PARTIAL_CLONE_FILTERS
+        ref: Branch or tag to reset to (default: the remote's default branch)
 
     Returns:
         True if successful, False otherwise
     """
-    if not LM_SAES_DIR.exists():
-        logger.error(f"Repository not found at {LM_SAES_DIR}. Run clone first.")
+    fetch_options = []
+    if depth > 0:
+        fetch_options.append(f"--depth={depth}")
+    if PARTIAL_CLONE_FILTERS[partial_clone]:
+        fetch_options.append(PARTIAL_CLONE_FILTERS[partial_clone])
+
+    logger.info(f"Updating repository at {LM_SAES_DIR}...")
+    try:
+        # reset keeps the sparse-checkout settings and untracked files (the stamps)
+        _git_batch(
+            ["-C", str(LM_SAES_DIR), "fetch", *fetch_options, "origin", ref or "HEAD"],
+            ["-C", str(LM_SAES_DIR), "reset", "--hard", "FETCH_HEAD"],
+        )
+        logger.info("Repository updated successfully")
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Failed to update repository: {e}")
+        logger.error(f"Output (last lines):\n{e.output}")
+        return False
+    except FileNotFoundError:
+        logger.error("git command not found. Please install git.")
         return False
 
-    setup_py = LM_SAES_DIR / "setup.py"
-    pyproject_toml = LM_SAES_DIR / "pyproject.toml"
 
-    if not setup_py.exists() and not pyproject_toml.exists():
-        logger.warning("No setup.py or pyproject.toml found. Adding to PYTHONPATH instead.")
-        return add_to_pythonpath()
+def _warm_pip():
+    """
+    Run two cheap pip commands so pip's modules and cache directory are in
+    the OS page cache by the time the real install starts. Failures are ignored.
+    """
+    for args in (["--version"], ["cache", "dir"]):
+        subprocess.run(
+            [sys.executable, "-m", "pip", *args],
+            capture_output=True,
+            text=True,
+        )
 
-    logger.info(f"Installing Language-Model-SAEs from {LM_SAES_DIR}...")
+
+def _head_sha() -> Optional[str]:
+    """Return the commit checked out in LM_SAES_DIR, or None if unavailable"""
     try:
-        subprocess.run(
-            [sys.executable, "-m", "pip", "install", "-e", str(LM_SAES_DIR)],
+        return subprocess.run(
+            [_git_executable(), "-C", str(LM_SAES_DIR), "rev-parse", "HEAD"],
             check=True,
             capture_output=True,
             text=True,
+        ).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def _install_stamp(editable: bool) -> Optional[dict]:
+    """
+    Describe the current checkout, environment and install mode for INSTALL_STAMP.
+
+    sys.prefix identifies the environment, so a new or recreated venv on the
+    same interpreter does not match a stamp written for another one.
+
+    Args:
+        editable: Whether the package is installed in editable mode
+
+    Returns:
+        Stamp contents, or None if the checkout's commit cannot be determined
+    """
+    head = _head_sha()
+    if head is None:
+        return None
+
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        pip_version = version("pip")
+    except PackageNotFoundError:
+        pip_version = None
+
+    return {
+        "head": head,
+        "python": sys.version,
+        "prefix": sys.prefix,
+        "pip": pip_version,
+        "editable": editable,
+    }
+
+
+def _lm_saes_distribution_installed() -> bool:
+    """Whether an lm_saes distribution is installed in the running environment"""
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        version(LM_SAES_DIST)
+        return True
+    except PackageNotFoundError:
+        return False
+
+
+def _build_wheel(head: str, pip_options: Sequence[str]) -> Path:
+    """
+    Build a wheel of the checkout, reusing one already built for the same commit.
+
+    Args:
+        head: Commit of the checkout, used as the cache key
+        pip_options: Index/cache options passed on to pip
+
+    Returns:
+        Path to the wheel
+
+    Raises:
+        CalledProcessError: If the build fails
+    """
+    wheel_dir = WHEEL_CACHE / "lm_saes" / head
+    wheels = sorted(wheel_dir.glob("*.whl")) if wheel_dir.is_dir() else []
+    if wheels:
+        logger.info(f"Using cached wheel {wheels[0].name} for {head[:12]}")
+        return wheels[0]
+
+    logger.info(f"Building wheel for {head[:12]}...")
+    _run([sys.executable, "-m", "pip", "wheel", *pip_options, "--no-deps",
+          "-w", str(wheel_dir), str(LM_SAES_DIR)])
+    return sorted(wheel_dir.glob("*.whl"))[0]
+
+
+def _fill_wheel_cache() -> bool:
+    """
+    Build wheels for Language-Model-SAEs and all its dependencies into WHEEL_CACHE.
+
+    Returns:
+        True if successful, False otherwise
+    """
+    WHEEL_CACHE.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Filling wheel cache at {WHEEL_CACHE}...")
+    try:
+        _run(
+            [sys.executable, "-m", "pip", "wheel", "--prefer-binary",
+             "--find-links", str(WHEEL_CACHE), "-w", str(WHEEL_CACHE), str(LM_SAES_DIR)]
         )
+        logger.info("Wheel cache filled successfully")
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Failed to fill wheel cache: {e}")
+        logger.error(f"Output (last lines):\n{e.output}")
+        return False
+
+
+def install_package(
+    offline: bool = False,
+    fill_wheel_cache: bool = False,
+    editable: bool = False,
+) -> bool:
+    """
+    Install the Language-Model-SAEs package.
+
+    By default a wheel is built once per commit (cached in WHEEL_CACHE) and
+    installed; editable mode installs the checkout in place instead.
+    Skipped when INSTALL_STAMP shows the same commit was already installed
+    into the same environment with the same Python, pip and mode, and the
+    distribution is still installed. Wheels in WHEEL_CACHE are preferred
+    over PyPI downloads.
+
+    Args:
+        offline: Install only from WHEEL_CACHE and already-installed
+            packages, without contacting PyPI (also disables build isolation,
+            which would need to download the build backend)
+        fill_wheel_cache: Build all required wheels into WHEEL_CACHE first
+        editable: Install in editable mode (for working on lm_saes itself)
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if not _lm_dir_exists():
+        logger.error(f"Repository not found at {LM_SAES_DIR}. Run clone first.")
+        return False
+
+    import json
+    stamp = _install_stamp(editable)
+    if stamp is not None and INSTALL_STAMP.exists():
+        try:
+            if (
+                json.loads(INSTALL_STAMP.read_text()) == stamp
+                and _lm_saes_distribution_installed()
+            ):
+                logger.info(f"Install stamp matches {stamp['head'][:12]}, skipping pip install")
+                return True
+        except ValueError:
+            pass
+
+    # One directory listing answers all packaging-file checks
+    with os.scandir(LM_SAES_DIR) as entries:
+        top_level = {entry.name for entry in entries}
+
+    if top_level.isdisjoint(PACKAGING_FILES):
+        logger.warning("No setup.py or pyproject.toml found. Adding to PYTHONPATH instead.")
+        return add_to_pythonpath()
+
+    if fill_wheel_cache and not _fill_wheel_cache():
+        logger.warning("Continuing without a filled wheel cache")
+
+    pip_options = ["--prefer-binary"]
+    if WHEEL_CACHE.is_dir():
+        pip_options += ["--find-links", str(WHEEL_CACHE)]
+    if offline:
+        pip_options += ["--no-index", "--no-build-isolation"]
+
+    logger.info(f"Installing Language-Model-SAEs from {LM_SAES_DIR}...")
+    pip_install = [sys.executable, "-m", "pip", "install", *pip_options]
+    try:
+        if editable or stamp is None:
+            _run([*pip_install, "-e", str(LM_SAES_DIR)])
+        else:
+            wheel = _build_wheel(stamp["head"], pip_options)
+            # The version rarely changes between commits, so replace the
+            # package explicitly, then let pip add any missing dependencies
+            _run([*pip_install, "--no-deps", "--force-reinstall", str(wheel)])
+            _run([*pip_install, str(wheel)])
         logger.info("Package installed successfully")
+        if stamp is not None:
+            INSTALL_STAMP.write_text(json.dumps(stamp))
         return True
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to install package: {e}")
-        logger.error(f"stdout: {e.stdout}")
-        logger.error(f"stderr: {e.stderr}")
+        logger.error(f"Output (last lines):\n{e.output}")
         logger.warning("Falling back to PYTHONPATH method")
         return add_to_pythonpath()
 
@@ -103,22 +484,23 @@ def add_to_pythonpath() -> bool:
         return False
 
     # Get site-packages directory
-    import site
-    site_packages = site.getsitepackages()[0] if site.getsitepackages() else None
-
-    if site_packages is None:
-        # Fallback: use user site-packages
-        site_packages = site.getusersitepackages()
-
+    site_packages = _site_packages()
     if not site_packages:
         logger.error("Could not determine site-packages directory")
         return False
 
-    # Create .pth file
+    # Create .pth file, unless it already points at the checkout
     pth_file = Path(site_packages) / "lm_saes_path.pth"
     try:
-        with open(pth_file, "w") as f:
-            f.write(str(LM_SAES_SRC.absolute()))
+        if pth_file.exists() and pth_file.read_text().strip() == LM_SAES_SRC_PTH_ENTRY:
+            logger.info(f"{LM_SAES_SRC} already on PYTHONPATH via {pth_file}")
+            return True
+
+        # Write then rename, so a concurrently starting interpreter never
+        # sees a partially written file
+        tmp_file = pth_file.with_suffix(".pth.tmp")
+        tmp_file.write_text(LM_SAES_SRC_PTH_ENTRY)
+        os.replace(tmp_file, pth_file)
         logger.info(f"Added {LM_SAES_SRC} to PYTHONPATH via {pth_file}")
         return True
     except Exception as e:
@@ -128,32 +510,56 @@ def add_to_pythonpath() -> bool:
 
 def verify_installation() -> bool:
     """
-    Verify that Language-Model-SAEs can be imported.
+    Verify that Language-Model-SAEs and the submodules the backend uses can be found.
+
+    Uses import specs rather than importing, so lm_saes (and the torch stack
+    it pulls in) is not initialized. Missing third-party dependencies
+    surface when the backend first loads a model.
 
     Returns:
-        True if import successful, False otherwise
+        True if all modules were found, False otherwise
     """
+    from importlib.machinery import PathFinder
+    from importlib.util import find_spec
+
     # Add to path temporarily for verification
-    if LM_SAES_SRC.exists():
-        sys.path.insert(0, str(LM_SAES_SRC))
+    src = str(LM_SAES_SRC)
+    added = LM_SAES_SRC.exists() and src not in sys.path
+    if added:
+        sys.path.insert(0, src)
 
     try:
-        import lm_saes
-        from lm_saes.backend import LanguageModel
-        from lm_saes.config import SAEConfig, LanguageModelConfig
-        from lm_saes.sae import SparseAutoEncoder
-        logger.info("✓ Language-Model-SAEs imported successfully")
-        logger.info(f"  Package location: {lm_saes.__file__}")
-        return True
-    except ImportError as e:
-        logger.error(f"✗ Failed to import Language-Model-SAEs: {e}")
+        spec = find_spec("lm_saes")
+        if spec is None:
+            missing = ["lm_saes"]
+        else:
+            # Look submodules up in the package directory directly; find_spec
+            # on a dotted name would import the parent package
+            missing = [
+                f"lm_saes.{name}"
+                for name in LM_SAES_SUBMODULES
+                if PathFinder.find_spec(name, spec.submodule_search_locations) is None
+            ]
+    finally:
+        if added:
+            sys.path.remove(src)
+
+    if missing:
+        logger.error(f"✗ Language-Model-SAEs modules not found: {', '.join(missing)}")
         logger.error("  Please ensure the package is installed or in PYTHONPATH")
         return False
 
+    logger.info("✓ Language-Model-SAEs found")
+    logger.info(f"  Package location: {spec.origin}")
+    return True
+
 
 def main():
     """Main setup function"""
     import argparse
+    from concurrent.futures import ThreadPoolExecutor
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
     parser = argparse.ArgumentParser(description="Setup Language-Model-SAEs dependency")
     parser.add_argument(
@@ -161,11 +567,62 @@ def main():
         action="store_true",
         help="Force re-clone of repository",
     )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Fetch and reset an existing clone to the latest upstream commit",
+    )
+    parser.add_argument(
+        "--ref",
+        default=LM_SAES_REF,
+        help="Branch or tag of Language-Model-SAEs to install "
+        "(default: $MODX_LM_SAES_REF, else the default branch)",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=1,
+        help="Commits of history to clone (default: 1, 0 for full history)",
+    )
+    parser.add_argument(
+        "--partial-clone",
+        choices=sorted(PARTIAL_CLONE_FILTERS),
+        default="blob",
+        help="Partial clone filter: blob (blob:none), tree (tree:0) or none (default: blob)",
+    )
+    parser.add_argument(
+        "--sparse",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Check out only src/ and top-level packaging files (default: enabled)",
+    )
+    parser.add_argument(
+        "--reference-dir",
+        type=Path,
+        default=LM_SAES_MIRROR,
+        help="Bare mirror to borrow git objects from, created on first use "
+        "(default: $MODX_LM_SAES_MIRROR)",
+    )
     parser.add_argument(
         "--skip-install",
         action="store_true",
         help="Skip pip install, only clone and add to PYTHONPATH",
     )
+    parser.add_argument(
+        "--editable",
+        action="store_true",
+        help="Install in editable mode instead of from a cached wheel",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Install from the local wheel cache only, without contacting PyPI",
+    )
+    parser.add_argument(
+        "--fill-wheel-cache",
+        action="store_true",
+        help="Build wheels for Language-Model-SAEs and its dependencies into the wheel cache",
+    )
     parser.add_argument(
         "--verify-only",
         action="store_true",
@@ -178,14 +635,33 @@ def main():
         success = verify_installation()
         sys.exit(0 if success else 1)
 
-    # Step 1: Clone repository
-    if not clone_repo(force=args.force):
+    # Step 1: Clone repository (network-bound), warming up pip meanwhile
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        clone_future = executor.submit(
+            clone_repo,
+            force=args.force,
+            depth=args.depth,
+            partial_clone=args.partial_clone,
+            sparse=args.sparse,
+            update=args.update,
+            reference_dir=args.reference_dir,
+            ref=args.ref,
+        )
+        if not args.skip_install:
+            executor.submit(_warm_pip)
+        cloned = clone_future.result()
+
+    if not cloned:
         logger.error("Failed to clone repository")
         sys.exit(1)
 
     # Step 2: Install package
     if not args.skip_install:
-        if not install_package():
+        if not install_package(
+            offline=args.offline,
+            fill_wheel_cache=args.fill_wheel_cache,
+            editable=args.editable,
+        ):
             logger.error("Failed to install package")
             sys.exit(1)
 
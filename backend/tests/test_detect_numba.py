@@ -0,0 +1,38 @@
+"""Tests for the Numba feature detection kernel"""
+
+import numpy as np
+import pytest
+
+from app.core import _detect_numba
+
+pytestmark = pytest.mark.skipif(
+    not _detect_numba.NUMBA_AVAILABLE, reason="numba is not installed"
+)
+
+
+def test_detect_topk_hits_flags_quarantined_features():
+    activations = np.array([[0.0, 5.0, 1.0, 3.0]], dtype=np.float32)
+    quarantine = np.array([3], dtype=np.int64)
+
+    values, indices, is_hit, row_max = _detect_numba.detect_topk_hits(
+        activations, quarantine, 2, 1e-3
+    )
+
+    assert indices.tolist() == [[1, 3]]
+    assert values.tolist() == [[5.0, 3.0]]
+    assert is_hit.tolist() == [[False, True]]
+    assert row_max.tolist() == [5.0]
+
+
+def test_detect_topk_hits_with_zero_top_k_returns_no_hits():
+    activations = np.array([[0.0, 5.0, 1.0], [2.0, 0.0, 4.0]], dtype=np.float32)
+    quarantine = np.array([1, 2], dtype=np.int64)
+
+    values, indices, is_hit, row_max = _detect_numba.detect_topk_hits(
+        activations, quarantine, 0, 1e-3
+    )
+
+    assert values.shape == (2, 0)
+    assert indices.shape == (2, 0)
+    assert is_hit.shape == (2, 0)
+    assert row_max.tolist() == [0.0, 0.0]
@@ -0,0 +1,55 @@
+"""Tests for quarantined feature detection"""
+
+import json
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from app.core import _detect_numba  # noqa: E402
+from app.core.feature_detector import FeatureDetector  # noqa: E402
+
+
+@pytest.fixture
+def detector(tmp_path):
+    path = tmp_path / "quarantined_features.json"
+    path.write_text(json.dumps({"1": "low", "3": "high"}))
+    return FeatureDetector(str(path))
+
+
+def _activations():
+    # Feature 3 appears at position 0 and feature 1 only at position 1, so
+    # first-appearance order (3, 1) differs from feature index order (1, 3)
+    return torch.tensor(
+        [
+            [0.0, 0.0, 0.0, 5.0],
+            [0.0, 4.0, 0.0, 0.0],
+        ]
+    )
+
+
+def _hits(detector, find_hits):
+    rows = _activations()
+    hits, _ = find_hits(rows, torch.arange(rows.shape[0]), 2)
+    return [(feature_idx, token_pos) for feature_idx, _, token_pos in hits]
+
+
+def test_torch_path_returns_hits_in_first_appearance_order(detector):
+    assert _hits(detector, detector._find_hits_torch) == [(3, 0), (1, 1)]
+
+
+@pytest.mark.skipif(not _detect_numba.NUMBA_AVAILABLE, reason="numba is not installed")
+def test_numba_and_torch_paths_return_the_same_order(detector):
+    assert _hits(detector, detector._find_hits_numba) == _hits(
+        detector, detector._find_hits_torch
+    )
+
+
+def test_negative_token_positions_count_from_the_end(detector):
+    result = detector.detect_quarantined_activations(
+        _activations(), layer=0, top_k=2, token_positions=[-1, 5]
+    )
+
+    # -1 is the last position; 5 is out of range and is not counted as checked
+    assert [(f.feature_index, f.token_position) for f in result.activated_features] == [(1, 1)]
+    assert result.total_features_checked == 2
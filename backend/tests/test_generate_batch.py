@@ -0,0 +1,65 @@
+"""Tests for the /generate micro-batch handler"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("torch")
+
+from app.api.routes import _generate_batch, _ModelLoadError  # noqa: E402
+
+
+class _FakeModelManager:
+    def __init__(self, bad_model_id=None):
+        self.loaded = "default"
+        self.bad_model_id = bad_model_id
+
+    def reload_model(self, model_id):
+        if model_id == self.bad_model_id:
+            raise ValueError("not found")
+        self.loaded = model_id
+
+
+class _FakePipeline:
+    def __init__(self, model_manager):
+        self.model_manager = model_manager
+
+    def generate_with_probing_batch(self, prompts, layers=None, generation_configs=None):
+        return [(self.model_manager.loaded, prompt) for prompt in prompts]
+
+
+def _state(bad_model_id=None):
+    manager = _FakeModelManager(bad_model_id)
+    return SimpleNamespace(
+        model_manager=manager,
+        inference_pipeline=_FakePipeline(manager),
+        model_lock=threading.Lock(),
+    )
+
+
+def test_generate_batch_runs_each_model_group_on_its_model():
+    items = [
+        ("a", None, None, "model-b"),
+        ("b", None, None, None),
+        ("c", None, None, "model-c"),
+        ("d", None, None, "model-b"),
+    ]
+
+    results = _generate_batch(_state(), items)
+
+    assert results == [
+        ("model-b", "a"),
+        ("default", "b"),
+        ("model-c", "c"),
+        ("model-b", "d"),
+    ]
+
+
+def test_generate_batch_isolates_model_load_failure():
+    items = [("a", None, None, "missing"), ("b", None, None, None)]
+
+    results = _generate_batch(_state(bad_model_id="missing"), items)
+
+    assert isinstance(results[0], _ModelLoadError)
+    assert results[1] == ("default", "b")
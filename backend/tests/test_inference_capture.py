@@ -0,0 +1,110 @@
+"""Tests for activation capture during generation"""
+
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from app.core.inference import InferencePipeline  # noqa: E402
+from app.models.feature_state import FeatureDetectionResult  # noqa: E402
+
+D_MODEL = 4
+LAYER = 0
+
+
+class _FakeHookPoint:
+    def __init__(self):
+        self.hooks = []
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hooks(self):
+        self.hooks = []
+
+    def __call__(self, act):
+        for hook in self.hooks:
+            hook(act, self)
+
+
+class _FakeHookedTransformer:
+    """Mimics HookedTransformer: the residual stream at a position equals its token id"""
+
+    def __init__(self, next_token=7):
+        self.next_token = next_token
+        self.hook_point = _FakeHookPoint()
+        self.hook_dict = {f"blocks.{LAYER}.hook_resid_post": self.hook_point}
+
+    def _resid(self, tokens):
+        return tokens.unsqueeze(-1).expand(*tokens.shape, D_MODEL).float()
+
+    def generate(self, tokens, max_new_tokens, **kwargs):
+        # Prefill, then one decode step per sampled token except the last
+        self.hook_point(self._resid(tokens))
+        output = tokens
+        for step in range(max_new_tokens):
+            if step > 0:
+                self.hook_point(self._resid(output[:, -1:]))
+            sampled = torch.full((tokens.shape[0], 1), self.next_token + step)
+            output = torch.cat([output, sampled], dim=1)
+        return output
+
+
+def _pipeline():
+    pipeline = object.__new__(InferencePipeline)
+    pipeline.settings = SimpleNamespace(feature_top_k=5)
+    return pipeline
+
+
+def test_single_new_token_is_captured_and_probed():
+    pipeline = _pipeline()
+    model = SimpleNamespace(model=_FakeHookedTransformer())
+    tokens = torch.tensor([[1, 2, 3]])
+
+    output, activations = pipeline._generate_with_capture(
+        model, tokens, {"max_new_tokens": 1}, LAYER
+    )
+    activations = pipeline._trim_activations(
+        activations, output[0, 3:], 0, 3, eos_token_id=None
+    )
+
+    assert activations.shape == (1, 4, D_MODEL)
+    assert activations[0, 3, 0].item() == 7
+
+    probed = []
+
+    def encode_activations(layer, acts):
+        probed.append(acts)
+        return acts.float()
+
+    pipeline.sae_manager = SimpleNamespace(encode_activations=encode_activations)
+    pipeline.feature_detector = SimpleNamespace(
+        detect_quarantined_activations=lambda *args, **kwargs: FeatureDetectionResult(
+            has_quarantined_features=False,
+            activated_features=[],
+            total_features_checked=5,
+            max_activation_value=0.0,
+        )
+    )
+
+    pipeline._probe_generated("prompt", "text", activations, 3, LAYER)
+
+    assert len(probed) == 1
+    assert probed[0].shape == (1, 1, D_MODEL)
+    assert probed[0][0, 0, 0].item() == 7
+
+
+def test_last_probed_token_is_last_sampled_token():
+    pipeline = _pipeline()
+    model = SimpleNamespace(model=_FakeHookedTransformer())
+    tokens = torch.tensor([[1, 2, 3]])
+
+    output, activations = pipeline._generate_with_capture(
+        model, tokens, {"max_new_tokens": 3}, LAYER
+    )
+
+    # The extra sampled token is dropped from the output
+    assert output.shape == (1, 6)
+    assert activations.shape == (1, output.shape[1], D_MODEL)
+    assert activations[0, -1, 0].item() == output[0, -1].item()
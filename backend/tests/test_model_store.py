@@ -0,0 +1,22 @@
+"""Tests for the in-memory model store"""
+
+from app.core.model_store import ModelStore
+
+
+def _store(num_models):
+    store = ModelStore()
+    for i in range(num_models):
+        store.add_model(model_url=f"https://huggingface.co/org/model-{i}", model_id=f"org/model-{i}")
+    return store
+
+
+def test_list_models_limit_returns_most_recent():
+    models = _store(3).list_models(limit=2)
+
+    assert [m.model_id for m in models] == ["org/model-2", "org/model-1"]
+
+
+def test_list_models_negative_limit_uses_slice_semantics():
+    models = _store(3).list_models(limit=-1)
+
+    assert [m.model_id for m in models] == ["org/model-2", "org/model-1"]